@@ -0,0 +1,237 @@
+"""Micro-Doppler features and activity classification of recorded sessions.
+
+The medida*.csv captures are labelled by their number: 01 walking toward
+the radar, 02 walking away, 03 background, 04/05 walking in place facing
+/ not facing it. Every recording is turned into the slow-time spectrogram
+the viewer draws for range streams, reduced to a few features per column
+and summarised over sliding windows, which a Gaussian naive Bayes model
+learns to label. The slow-time signal is the strongest range bin after
+moving-average clutter removal, see ``processing.slow_time_signal``.
+``ActivityStage`` runs the model live in a StreamGraph.
+
+    python activity.py train medida0[1-5]*.csv --model activity.npz
+    python activity.py evaluate medida0[1-5]*.csv
+    python activity.py predict medida00.csv --model activity.npz
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+
+from dsp import SpectrogramBuffer, stft_power
+from processing import HOP_SIZE, SUMS_FFT_SIZE, h_window, slow_time_signal
+from replay import load_frames
+
+LABELS = {
+    "01": "toward",
+    "02": "away",
+    "03": "background",
+    "04": "in_place_facing",
+    "05": "in_place_not_facing",
+}
+
+FEATURES = ("energy_db", "centroid", "bandwidth", "static", "positive", "lower_envelope", "upper_envelope")
+# Doppler of each FFT bin in cycles per ramp, in FFT order
+DOPPLER = np.fft.fftfreq(SUMS_FFT_SIZE)
+_ASCENDING = np.argsort(DOPPLER)
+ENVELOPE = (0.1, 0.9)
+
+# columns per classified window and columns between classifications,
+# 0.5 s and 0.1 s at the 100 Hz ramp rate
+WINDOW = 50
+HOP = 10
+
+
+def label_for(path):
+    match = re.search(r"medida(\d\d)", os.path.basename(path))
+    return LABELS.get(match.group(1)) if match else None
+
+
+def spectrogram(path):
+    """Slow-time power spectrogram of a recording, one row per ramp."""
+    _, frames, _ = load_frames(path)
+    return stft_power(slow_time_signal(frames["payload"]), h_window, HOP_SIZE)
+
+
+def column_features(power):
+    """Per-column features of a (columns, SUMS_FFT_SIZE) power spectrogram."""
+    power = np.atleast_2d(power)
+    total = power.sum(axis=-1)
+    p = power / np.maximum(total, np.finfo(power.dtype).tiny)[:, None]
+    centroid = p @ DOPPLER
+    bandwidth = np.sqrt(np.maximum(p @ DOPPLER**2 - centroid**2, 0))
+    # Doppler below which 10% and 90% of the column energy lies
+    cdf = np.cumsum(p[:, _ASCENDING], axis=-1)
+    lower, upper = (DOPPLER[_ASCENDING][np.argmax(cdf >= q, axis=-1)] for q in ENVELOPE)
+    return np.column_stack(
+        [
+            10 * np.log10(np.maximum(total, 1e-30)),
+            centroid,
+            bandwidth,
+            p[:, 0],
+            p[:, DOPPLER > 0].sum(axis=-1),
+            lower,
+            upper,
+        ]
+    )
+
+
+def window_features(columns, window=WINDOW, hop=HOP):
+    """Mean and standard deviation of column features over sliding windows."""
+    if len(columns) < window:
+        return np.empty((0, 2 * columns.shape[1]))
+    windows = np.lib.stride_tricks.sliding_window_view(columns, window, axis=0)[::hop]
+    return np.concatenate([windows.mean(axis=-1), windows.std(axis=-1)], axis=-1)
+
+
+def recording_features(path, window=WINDOW, hop=HOP):
+    return window_features(column_features(spectrogram(path)), window, hop)
+
+
+class GaussianNaiveBayes:
+    def __init__(self, classes, means, variances, priors):
+        self.classes = np.asarray(classes)
+        self.means = np.asarray(means)
+        self.variances = np.asarray(variances)
+        self.log_priors = np.log(priors)
+
+    @classmethod
+    def fit(cls, x, y, smoothing=1e-9):
+        classes = np.unique(y)
+        means = np.array([x[y == c].mean(axis=0) for c in classes])
+        # as in scikit-learn, keeps constant features from dividing by zero
+        variances = np.array([x[y == c].var(axis=0) for c in classes]) + smoothing * x.var(axis=0).max()
+        priors = np.array([(y == c).mean() for c in classes])
+        return cls(classes, means, variances, priors)
+
+    def log_likelihood(self, x):
+        x = np.atleast_2d(x)[:, None, :]
+        return self.log_priors - 0.5 * (
+            np.log(2 * np.pi * self.variances) + (x - self.means) ** 2 / self.variances
+        ).sum(axis=-1)
+
+    def predict(self, x):
+        return self.classes[np.argmax(self.log_likelihood(x), axis=-1)]
+
+    def predict_proba(self, x):
+        ll = self.log_likelihood(x)
+        p = np.exp(ll - ll.max(axis=-1, keepdims=True))
+        return p / p.sum(axis=-1, keepdims=True)
+
+    def save(self, path):
+        np.savez(path, classes=self.classes, means=self.means, variances=self.variances, priors=np.exp(self.log_priors))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            return cls(f["classes"], f["means"], f["variances"], f["priors"])
+
+
+class ActivityStage:
+    """Classifies a stream live from the columns of a DopplerProcessor stage.
+
+    Add it to the graph after that stage. Each column costs one feature
+    row; every ``hop`` columns the last ``window`` rows are summarised and
+    classified, so the work per ramp stays constant.
+    """
+
+    def __init__(self, model, doppler, window=WINDOW, hop=HOP):
+        self.model = model
+        self.doppler = doppler
+        self.hop = hop
+        self.history = SpectrogramBuffer(len(FEATURES), window)
+        self.label = None
+        self.probability = 0.0
+        # whether the last frame produced a new classification
+        self.updated = False
+        self._seen = 0
+        self._since = 0
+
+    def process_frame(self, frame):
+        columns = column_features(self.doppler.columns)
+        self.history.extend(columns)
+        self._seen += len(columns)
+        self._since += len(columns)
+        self.updated = self._seen >= self.history.history and self._since >= self.hop
+        if not self.updated:
+            return False
+        self._since = 0
+        window = self.history.image
+        x = np.concatenate([window.mean(axis=0), window.std(axis=0)])
+        p = self.model.predict_proba(x)[0]
+        best = np.argmax(p)
+        self.label = str(self.model.classes[best])
+        self.probability = float(p[best])
+        return True
+
+    def result(self):
+        return self.label, self.probability
+
+
+def labelled_features(paths, window=WINDOW, hop=HOP):
+    xs, ys = [], []
+    for path in paths:
+        label = label_for(path)
+        if label is None:
+            print(f"{path}: no activity label in the file name, skipped", file=sys.stderr)
+            continue
+        x = recording_features(path, window, hop)
+        xs.append(x)
+        ys.append(np.full(len(x), label))
+    return xs, ys
+
+
+def confusion(classes, truth, predicted):
+    matrix = np.zeros((len(classes), len(classes)), dtype=int)
+    index = {c: i for i, c in enumerate(classes)}
+    np.add.at(matrix, ([index[t] for t in truth], [index[p] for p in predicted]), 1)
+    return matrix
+
+
+def print_confusion(classes, matrix):
+    width = max(len(c) for c in classes)
+    print(" " * width + "  " + " ".join(f"{c[:8]:>8s}" for c in classes))
+    for c, row in zip(classes, matrix):
+        print(f"{c:>{width}s}  " + " ".join(f"{n:8d}" for n in row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=("train", "evaluate", "predict"))
+    parser.add_argument("paths", nargs="+", help="medida*.csv captures or binary recordings")
+    parser.add_argument("--model", default="activity.npz", help="model file written by train, read by predict")
+    parser.add_argument("--window", type=int, default=WINDOW, help="columns per classified window")
+    parser.add_argument("--hop", type=int, default=HOP, help="columns between windows")
+    parser.add_argument("--split", type=float, default=0.7, help="evaluate: leading fraction of each recording used for training")
+    args = parser.parse_args(argv)
+
+    if args.command == "predict":
+        model = GaussianNaiveBayes.load(args.model)
+        for path in args.paths:
+            labels, counts = np.unique(model.predict(recording_features(path, args.window, args.hop)), return_counts=True)
+            summary = ", ".join(f"{l} {n / counts.sum():.0%}" for l, n in sorted(zip(labels, counts), key=lambda lc: -lc[1]))
+            print(f"{path}: {summary}")
+        return
+
+    xs, ys = labelled_features(args.paths, args.window, args.hop)
+    if args.command == "train":
+        model = GaussianNaiveBayes.fit(np.concatenate(xs), np.concatenate(ys))
+        model.save(args.model)
+        print(f"{sum(map(len, xs))} windows of {len(model.classes)} activities, model written to {args.model}")
+        return
+
+    # chronological split, windows overlapping the boundary are dropped
+    gap = -(-args.window // args.hop)
+    train = [(x[: int(len(x) * args.split)], y[: int(len(y) * args.split)]) for x, y in zip(xs, ys)]
+    test = [(x[int(len(x) * args.split) + gap :], y[int(len(y) * args.split) + gap :]) for x, y in zip(xs, ys)]
+    model = GaussianNaiveBayes.fit(np.concatenate([x for x, _ in train]), np.concatenate([y for _, y in train]))
+    truth = np.concatenate([y for _, y in test])
+    predicted = model.predict(np.concatenate([x for x, _ in test]))
+    print(f"accuracy {np.mean(truth == predicted):.1%} on {len(truth)} windows")
+    print_confusion(model.classes, confusion(model.classes, truth, predicted))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Batch processing of recording archives on a process pool.
+
+Every input (medida*.csv capture or binary session recording) is split
+into chunks of frames that are processed independently by the workers
+and written straight into a preallocated output file per input, so
+memory per worker is bounded by the chunk size and the parent process
+only hands out frame ranges.
+
+The chain is applied in order to the complex range bins: ``clutter``
+removes the static background (moving average, or a background capture),
+``range_db`` stores the dB range profile and ``spectrogram`` the slow-time
+micro-Doppler power of the strongest bin. The default chain reproduces
+what the viewer draws for range streams.
+
+    python batch.py medida*.csv --output-dir results --jobs 8
+    python batch.py session.rec --chain clutter,range_db --background medida03_fondo.csv
+"""
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from datasets import load_csv
+from decoder import RANGE_FRAME
+from dsp import ClutterFilter, clutter_alpha, stft_power
+from processing import (
+    BIN_NO,
+    SLOW_TIME_CLUTTER_ALPHA,
+    SUMS_FFT_SIZE,
+    h_window,
+    load_background,
+    range_bins,
+    strongest_bin,
+    to_db,
+)
+from recorder import ALIGN, Recording, pack_header, read_header
+from replay import encode_range_frames
+
+MAGIC = b"EPSBAT\x00\x01"
+STAGES = ("clutter", "range_db", "spectrogram")
+DEFAULT_CHAIN = ("range_db", "clutter", "spectrogram")
+CHUNK_FRAMES = 65536
+# residual weight of the frames before a chunk once the moving average has warmed up
+WARMUP_RESIDUAL = 1e-6
+
+
+@dataclass(frozen=True)
+class BatchConfig:
+    chain: tuple = DEFAULT_CHAIN
+    clutter_alpha: float = SLOW_TIME_CLUTTER_ALPHA
+    background: str = None
+    chunk_frames: int = CHUNK_FRAMES
+
+    @property
+    def warmup(self):
+        # frames processed before each chunk and thrown away, so that
+        # chunked results match a single pass over the file
+        frames = SUMS_FFT_SIZE - 1
+        if "clutter" in self.chain and self.background is None and self.clutter_alpha > 0:
+            frames += math.ceil(math.log(WARMUP_RESIDUAL) / math.log(1 - self.clutter_alpha))
+        return frames
+
+
+def product_shape(name, frames):
+    if name == "range_db":
+        return (frames, BIN_NO)
+    # one row per full STFT window, row i ends at frame i + SUMS_FFT_SIZE - 1
+    return (max(frames - SUMS_FFT_SIZE + 1, 0), SUMS_FFT_SIZE)
+
+
+def source_frames(path):
+    """Number of range frames in a capture or recording, without loading them."""
+    if str(path).endswith(".csv"):
+        return len(load_csv(path))
+    recording = Recording(path)
+    if recording.format is not RANGE_FRAME:
+        raise ValueError(f"{path} holds {recording.format.name} frames, the batch chain needs range frames")
+    return len(recording)
+
+
+def read_frames(path, start, stop):
+    if str(path).endswith(".csv"):
+        return encode_range_frames(load_csv(path)[start:stop], start)
+    return Recording(path).frames[start:stop]
+
+
+@lru_cache(maxsize=4)
+def _background(path):
+    return load_background(path)
+
+
+def make_clutter_filter(config):
+    # alpha 0 turns the moving average off, as in the viewer
+    if config.background is not None:
+        return ClutterFilter(BIN_NO, background=_background(config.background))
+    if config.clutter_alpha > 0:
+        return ClutterFilter(BIN_NO, alpha=config.clutter_alpha)
+    return None
+
+
+def output_path(path, output_dir):
+    return os.path.join(output_dir, os.path.basename(path) + ".epsb")
+
+
+def write_header(path, source, frames, config):
+    products = {}
+    offset = 0
+    for name in config.chain:
+        if name == "clutter":
+            continue
+        shape = product_shape(name, frames)
+        products[name] = {"dtype": "<f4", "shape": shape, "offset": offset}
+        offset += -(-int(np.prod(shape)) * 4 // ALIGN) * ALIGN
+    header = pack_header(
+        MAGIC,
+        {
+            "source": os.path.basename(source),
+            "format": RANGE_FRAME.name,
+            "frames": frames,
+            "chain": list(config.chain),
+            "clutter_alpha": config.clutter_alpha,
+            "background": config.background and os.path.basename(config.background),
+            "products": products,
+            "created": time.time(),
+        },
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        f.truncate(len(header) + offset)
+
+
+class BatchOutput:
+    """Memory-mapped products of one processed input, by name."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header = read_header(f, MAGIC)
+            if self.header is None:
+                raise ValueError(f"{path} is not a batch output")
+            self.data_offset = f.tell()
+        self.products = {}
+        for name, info in self.header["products"].items():
+            shape = tuple(info["shape"])
+            if 0 in shape:
+                self.products[name] = np.empty(shape, dtype=info["dtype"])
+                continue
+            self.products[name] = np.memmap(
+                path, dtype=info["dtype"], mode="r", offset=self.data_offset + info["offset"], shape=shape
+            )
+
+    def __getitem__(self, name):
+        return self.products[name]
+
+    def _writable(self, name):
+        info = self.header["products"][name]
+        return np.memmap(
+            self.path, dtype=info["dtype"], mode="r+", offset=self.data_offset + info["offset"], shape=tuple(info["shape"])
+        )
+
+
+def process_chunk(source, output, start, stop, config):
+    """Run the chain over frames [start, stop) of ``source`` into ``output``."""
+    first = max(start - config.warmup, 0)
+    z = range_bins(read_frames(source, first, stop)["payload"])
+    skip = start - first
+    out = BatchOutput(output)
+    for name in config.chain:
+        if name == "clutter":
+            clutter = make_clutter_filter(config)
+            if clutter is None:
+                continue
+            cleaned = np.empty_like(z)
+            for i, bins in enumerate(z):
+                cleaned[i] = clutter(bins)
+            z = cleaned
+        elif name == "range_db":
+            rows = out._writable(name)
+            rows[start:stop] = to_db(z[skip:])
+            rows.flush()
+        elif name == "spectrogram":
+            # windows ending at frames [start, stop), i.e. rows start - 19 ...
+            lo = max(start - SUMS_FFT_SIZE + 1, 0)
+            hi = stop - SUMS_FFT_SIZE + 1
+            if hi <= lo:
+                continue
+            power = stft_power(strongest_bin(z), h_window)
+            rows = out._writable(name)
+            rows[lo:hi] = power[lo - first :]
+            rows.flush()
+    return stop - start
+
+
+def plan(paths, output_dir, config, pool):
+    # parse CSV captures into their .npy caches in parallel first
+    frames = dict(zip(paths, pool.map(source_frames, paths)))
+    tasks = []
+    for path in paths:
+        output = output_path(path, output_dir)
+        write_header(output, path, frames[path], config)
+        for start in range(0, frames[path], config.chunk_frames):
+            tasks.append((path, output, start, min(start + config.chunk_frames, frames[path])))
+    return tasks, sum(frames.values())
+
+
+def run(paths, output_dir, config, jobs=None, progress=None):
+    """Process ``paths`` on ``jobs`` worker processes; returns the output paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count()
+    with ProcessPoolExecutor(jobs) as pool:
+        tasks, total = plan(paths, output_dir, config, pool)
+        # a bounded number of chunks in flight keeps the parent's memory flat
+        limit = 2 * jobs
+        pending = set()
+        done_frames = 0
+        started = time.perf_counter()
+        for task in tasks:
+            while len(pending) >= limit:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                done_frames += sum(f.result() for f in finished)
+                if progress is not None:
+                    progress(done_frames, total, time.perf_counter() - started)
+            pending.add(pool.submit(process_chunk, *task, config))
+        for future in pending:
+            done_frames += future.result()
+        if progress is not None:
+            progress(done_frames, total, time.perf_counter() - started)
+    return [output_path(path, output_dir) for path in paths]
+
+
+class ProgressLine:
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self._next = 0.0
+
+    def __call__(self, done, total, elapsed):
+        if done < total and elapsed < self._next:
+            return
+        self._next = elapsed + self.interval
+        print_progress(done, total, elapsed)
+
+
+def print_progress(done, total, elapsed):
+    rate = done / elapsed if elapsed else 0.0
+    print(f"\r{done}/{total} frames ({done / max(total, 1):.0%}), {rate:.0f} frames/s", end="", file=sys.stderr)
+    if done == total:
+        print(file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="medida*.csv captures or binary range recordings")
+    parser.add_argument("--output-dir", default="batch_results", help="one <input>.epsb file per input goes here")
+    parser.add_argument("--chain", default=",".join(DEFAULT_CHAIN), help=f"comma-separated stages out of {', '.join(STAGES)}")
+    parser.add_argument("--clutter-alpha", type=clutter_alpha, default=SLOW_TIME_CLUTTER_ALPHA, help="moving-average weight of the clutter stage, 0 for none")
+    parser.add_argument("--background", metavar="PATH", help="subtract the mean profile of this capture instead of a moving average")
+    parser.add_argument("--chunk-frames", type=int, default=CHUNK_FRAMES, help="frames per task, bounds the memory of a worker")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    chain = tuple(args.chain.split(","))
+    unknown = set(chain) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages {', '.join(sorted(unknown))}")
+    config = BatchConfig(chain, args.clutter_alpha, args.background, args.chunk_frames)
+    outputs = run(args.paths, args.output_dir, config, args.jobs, None if args.quiet else ProgressLine())
+    for output in outputs:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Headless benchmark of the decode, DSP and render stages of both viewers.
+
+Runs without a radar or a display (Qt offscreen platform) on synthetic
+packets and on the recorded medida*.csv captures, and stores the results
+as JSON so runs from different versions can be compared.
+
+    python bench.py [--packets N] [--output PATH] [--compare PATH]
+"""
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import glob
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+from PyQt5 import QtWidgets
+
+import activity
+from datasets import load_csv
+from decoder import FRAME_FORMATS, FrameDecoder, encode_batch
+from fanout import PublishStage, make_publisher
+from graph import StreamGraph
+from processing import (
+    BACKENDS,
+    DopplerProcessor,
+    RangeDopplerProcessor,
+    RangeProcessor,
+    make_backend,
+    micro_doppler_columns,
+    range_bins,
+    range_profile_db,
+)
+from render import DEFAULT_FPS
+from replay import encode_range_frames
+from views import DopplerCanvas, RangeCanvas, RangeDopplerCanvas
+
+PERCENTILES = (50, 90, 99)
+
+
+def synthetic_packets(fmt, count, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = np.zeros(count, dtype=fmt.dtype)
+    info = np.iinfo(fmt.dtype["payload"].base)
+    frames["payload"] = rng.integers(info.min // 64, info.max // 64, frames["payload"].shape)
+    if "ramp" in fmt.dtype.names:
+        frames["ramp"] = np.arange(count) & 0xFFFF
+    return [bytearray(f.tobytes()) for f in frames]
+
+
+def recorded_packets(count):
+    frames = np.concatenate([encode_range_frames(load_csv(path)) for path in sorted(glob.glob("medida*.csv"))])
+    return [bytearray(f.tobytes()) for f in frames[:count]]
+
+
+def time_stage(fn, items):
+    samples = np.empty(len(items))
+    out = []
+    for i, item in enumerate(items):
+        t0 = time.perf_counter()
+        out.append(fn(item))
+        samples[i] = time.perf_counter() - t0
+    return samples, out
+
+
+def summarize(samples):
+    stats = {f"p{p}_us": float(np.percentile(samples, p) * 1e6) for p in PERCENTILES}
+    stats["mean_us"] = float(samples.mean() * 1e6)
+    stats["max_us"] = float(samples.max() * 1e6)
+    return stats
+
+
+def max_packet_rate(dsp_mean, render_mean, fps):
+    # packets/s left once the scheduler has spent its share on repaints
+    budget = 1.0 - min(render_mean * fps, 1.0)
+    return budget / dsp_mean
+
+
+def bench_range(packets, fps):
+    canvas = RangeCanvas()
+    decode, frames = time_stage(canvas.processor.decoder.decode, packets)
+    db, profiles = time_stage(lambda f: range_profile_db(f["payload"]), frames)
+
+    def render(profile):
+        canvas.lindata = profile
+        canvas.render()
+
+    render_t, _ = time_stage(render, profiles)
+    dsp = decode + db
+    return {
+        "decode": summarize(decode),
+        "db_magnitude": summarize(db),
+        "set_data": summarize(render_t),
+        "max_packet_rate": max_packet_rate(dsp.mean(), render_t.mean(), fps),
+        "max_packet_rate_inline": 1.0 / (dsp + render_t).mean(),
+    }
+
+
+def bench_micro_doppler(packets, fps):
+    canvas = DopplerCanvas()
+    processor = canvas.processor
+    decode, frames = time_stage(processor.decoder.decode, packets)
+    stft, columns = time_stage(lambda f: micro_doppler_columns(f["payload"]), frames)
+    append, _ = time_stage(processor.spectrogram.extend, columns)
+    handoff, images = time_stage(lambda _: processor.result(), packets)
+
+    def render(image):
+        canvas.image = image
+        canvas.render()
+
+    render_t, _ = time_stage(render, images)
+    dsp = decode + stft + append
+    return {
+        "decode": summarize(decode),
+        "stft": summarize(stft),
+        "spectrogram_append": summarize(append),
+        "result_handoff": summarize(handoff),
+        "set_image": summarize(render_t),
+        "max_packet_rate": max_packet_rate(dsp.mean(), render_t.mean(), fps),
+        "max_packet_rate_inline": 1.0 / (dsp + render_t).mean(),
+    }
+
+
+def bench_range_doppler(packets, fps):
+    canvas = RangeDopplerCanvas()
+    processor = canvas.processor
+    update, _ = time_stage(processor.process, packets)
+    handoff, images = time_stage(lambda _: processor.result(), packets)
+
+    def render(image):
+        canvas.image = image
+        canvas.render()
+
+    render_t, _ = time_stage(render, images)
+    return {
+        "map_update": summarize(update),
+        "result_handoff": summarize(handoff),
+        "set_image": summarize(render_t),
+        "max_packet_rate": max_packet_rate(update.mean(), render_t.mean(), fps),
+    }
+
+
+def bench_graph(packets):
+    # range and micro-Doppler of one stream: separate processors decode
+    # every packet twice, the graph decodes once and shares the frame
+    fmt = FRAME_FORMATS["range"]
+    range_only = RangeProcessor(fmt)
+    doppler_only = DopplerProcessor(fmt=fmt)
+    separate, _ = time_stage(lambda p: (range_only.process(p), doppler_only.process(p)), packets)
+    graph = StreamGraph(fmt)
+    graph.add_stage("range", RangeProcessor(fmt, graph.telemetry))
+    graph.add_stage("doppler", DopplerProcessor(telemetry=graph.telemetry, fmt=fmt))
+    shared, _ = time_stage(graph.process, packets)
+    # live activity classification on top, with a model of the captures
+    xs, ys = activity.labelled_features(sorted(glob.glob("medida0[1-5]*.csv")))
+    model = activity.GaussianNaiveBayes.fit(np.concatenate(xs), np.concatenate(ys))
+    graph.add_stage("activity", activity.ActivityStage(model, graph.stages["doppler"]))
+    classified, _ = time_stage(graph.process, packets)
+    return {
+        "separate_processors": summarize(separate),
+        "shared_graph": summarize(shared),
+        "shared_graph_activity": summarize(classified),
+        "max_packet_rate": 1.0 / shared.mean(),
+    }
+
+
+def bench_multi_frame(packets, pack=6):
+    # legacy one-frame notifications against multi-frame ones carrying
+    # only the plotted bins; 6 frames fill a 512-byte ATT MTU
+    fmt = FRAME_FORMATS["range"]
+    frames = np.frombuffer(b"".join(packets), dtype=fmt.dtype)
+    batches = [encode_batch(frames[i : i + pack]) for i in range(0, len(frames), pack)]
+    results = {}
+    for name, notifications in (("legacy", packets), ("packed", batches)):
+        graph = StreamGraph(fmt)
+        graph.add_stage("range", RangeProcessor(fmt, graph.telemetry))
+        decode, _ = time_stage(graph.decoder.decode_frames, notifications)
+        process, _ = time_stage(graph.process, notifications)
+        results[name] = {
+            "decode_per_frame": summarize(decode * len(notifications) / len(frames)),
+            "graph_per_frame": summarize(process * len(notifications) / len(frames)),
+            "bytes_per_frame": sum(map(len, notifications)) / len(frames),
+        }
+    return results
+
+
+def bench_publish(packets):
+    # cost the graph pays per frame for sharing it, with nobody reading
+    fmt = FRAME_FORMATS["range"]
+    frames = np.frombuffer(b"".join(packets), dtype=fmt.dtype)
+    results = {}
+    for transport in ("shm", "socket"):
+        publisher = make_publisher(f"epsilon-bench-{os.getpid()}", fmt, transport)
+        stage = PublishStage(publisher)
+        publish, _ = time_stage(stage.process_frame, frames)
+        publisher.close()
+        results[transport] = {"publish": summarize(publish)}
+    return results
+
+
+def bench_backends(packets):
+    # numpy against the firmware's fixed-point kernels, per operation,
+    # with the largest dB deviation from numpy on the same frames
+    decoder = RangeProcessor(FRAME_FORMATS["range"]).decoder
+    frames = [decoder.decode(p) for p in packets]
+    bins = [range_bins(f["payload"]) for f in frames]
+    # int32 q16.15 payloads take another conversion than int16 range ones
+    iq = FrameDecoder(FRAME_FORMATS["iq"])
+    iq_frames = [iq.decode(p) for p in synthetic_packets(FRAME_FORMATS["iq"], len(packets))]
+    results = {}
+    reference = {}
+    for name in BACKENDS:
+        try:
+            backend = make_backend(name)
+        except ImportError as e:
+            results[name] = {"skipped": str(e)}
+            continue
+        convert, _ = time_stage(lambda f: backend.to_float(f["payload"]), frames)
+        convert_iq, samples = time_stage(lambda f: backend.to_float(f["payload"]), iq_frames)
+        db, profiles = time_stage(backend.db, bins)
+        processor = RangeDopplerProcessor(backend=backend)
+        maps = []
+        update, _ = time_stage(lambda f: (processor.process_frame(f), maps.append(processor.map.copy())), frames)
+        results[name] = {
+            "to_float": summarize(convert),
+            "to_float_iq": summarize(convert_iq),
+            "magnitude_db": summarize(db),
+            "range_doppler_fft_db": summarize(update),
+        }
+        if name == "numpy":
+            reference = {"profile": np.array(profiles), "map": np.array(maps), "iq": np.array(samples)}
+        else:
+            results[name]["max_iq_error"] = float(np.abs(np.array(samples) - reference["iq"]).max())
+            results[name]["max_profile_error_db"] = float(np.abs(np.array(profiles) - reference["profile"]).max())
+            # where the map is within 40 dB of its peak, below that q15 runs out of bits
+            strong = reference["map"] > reference["map"].max() - 40
+            results[name]["max_map_error_db"] = float(np.abs(np.array(maps) - reference["map"])[strong].max())
+    timed = [n for n in results if "skipped" not in results[n]]
+    results["fastest"] = {
+        op: min(timed, key=lambda n: results[n][op]["mean_us"])
+        for op in ("to_float", "to_float_iq", "magnitude_db", "range_doppler_fft_db")
+    }
+    return results
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results, baseline=None):
+    for bench, stages in results["benchmarks"].items():
+        print(bench)
+        print_stages(stages, baseline and baseline["benchmarks"].get(bench), "  ")
+
+
+def print_stages(stages, baseline, indent):
+    for stage, stats in stages.items():
+        line = f"{indent}{stage:24s}"
+        ref = baseline and baseline.get(stage)
+        if isinstance(stats, dict) and "mean_us" not in stats:
+            print(line)
+            print_stages(stats, ref, indent + "  ")
+            continue
+        if isinstance(stats, dict):
+            line += " ".join(f"{k}={v:9.1f}" for k, v in stats.items())
+            if ref:
+                line += f"  ({(stats['p50_us'] / ref['p50_us'] - 1) * 100:+.0f}% p50)"
+        elif stage.startswith("max_packet_rate"):
+            line += f"{stats:12.0f} packets/s"
+        else:
+            line += f"{stats}"
+        print(line)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packets", type=int, default=2000)
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS)
+    parser.add_argument("--output", help="JSON results file (default bench_results/<version>.json)")
+    parser.add_argument("--compare", metavar="PATH", help="earlier results to compare against")
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    version = git_version()
+    results = {
+        "version": version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "packets": args.packets,
+        "fps": args.fps,
+        "benchmarks": {
+            "range_synthetic": bench_range(synthetic_packets(FRAME_FORMATS["range"], args.packets), args.fps),
+            "range_recorded": bench_range(recorded_packets(args.packets), args.fps),
+            "micro_doppler_synthetic": bench_micro_doppler(
+                synthetic_packets(FRAME_FORMATS["iq"], args.packets), args.fps
+            ),
+            "range_doppler_map": bench_range_doppler(recorded_packets(args.packets), args.fps),
+            "range_doppler_graph": bench_graph(recorded_packets(args.packets)),
+            "dsp_backends": bench_backends(recorded_packets(args.packets)),
+            "multi_frame": bench_multi_frame(recorded_packets(args.packets)),
+            "publish": bench_publish(recorded_packets(args.packets)),
+        },
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join("bench_results", f"{version}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main_bench()
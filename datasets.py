@@ -0,0 +1,113 @@
+import itertools
+import os
+
+import numpy as np
+
+CACHE_DIR = ".epsilon_cache"
+CHUNK_FRAMES = 8192
+
+# with whitespace as separator np.fromstring also skips blank lines and \r
+_SEPARATORS = bytes.maketrans(b";,", b"  ")
+
+
+def _row_bins(line):
+    return (line.count(b",") + line.count(b";") + 1) // 2
+
+
+def parse_csv_rows(text, bins=None):
+    """Parse ``I;Q`` rows into a complex64 array of shape (frames, bins).
+
+    Each row holds the comma-separated I values, a ``;`` and the Q values
+    of one ramp, already scaled to [-1, 1). The whole block is parsed in
+    one ``np.fromstring`` call; a truncated trailing row is dropped.
+    """
+    text = text.strip()
+    if not text:
+        return np.empty((0, bins or 0), dtype=np.complex64)
+    if bins is None:
+        bins = _row_bins(text.split(b"\n", 1)[0])
+    values = np.fromstring(text.translate(_SEPARATORS), dtype=np.float32, sep=" ")
+    values = values[: values.size - values.size % (2 * bins)].reshape(-1, 2, bins)
+    out = np.empty(values.shape[::2], dtype=np.complex64)
+    out.real = values[:, 0]
+    out.imag = values[:, 1]
+    return out
+
+
+def iter_csv_chunks(path, chunk_frames=CHUNK_FRAMES):
+    """Yield a medida*.csv capture as complex64 blocks of up to ``chunk_frames`` rows."""
+    with open(path, "rb") as f:
+        next(f)  # "I;Q" header
+        bins = None
+        while True:
+            lines = list(itertools.islice(f, chunk_frames))
+            if not lines:
+                return
+            if bins is None:
+                bins = _row_bins(lines[0].strip())
+            yield parse_csv_rows(b"".join(lines), bins)
+
+
+def _count_frames(path):
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1 << 20):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def sidecar_path(path):
+    st = os.stat(path)
+    head, name = os.path.split(os.path.abspath(path))
+    return os.path.join(head, CACHE_DIR, f"{name}.{st.st_size}.{st.st_mtime_ns}.npy")
+
+
+def _build_sidecar(path, sidecar):
+    os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+    prefix = os.path.basename(path) + "."
+    for stale in os.listdir(os.path.dirname(sidecar)):
+        if stale.startswith(prefix) and stale.endswith(".npy"):
+            os.remove(os.path.join(os.path.dirname(sidecar), stale))
+    chunks = iter_csv_chunks(path)
+    first = next(chunks, np.empty((0, 0), dtype=np.complex64))
+    tmp = sidecar + ".tmp"
+    out = np.lib.format.open_memmap(
+        tmp, mode="w+", dtype=np.complex64, shape=(_count_frames(path), first.shape[1])
+    )
+    n = 0
+    for chunk in itertools.chain([first], chunks):
+        out[n : n + len(chunk)] = chunk
+        n += len(chunk)
+    out.flush()
+    if n != len(out):
+        # blank or truncated lines: rewrite with the rows actually parsed
+        np.save(sidecar, out[:n])
+        del out
+        os.remove(tmp)
+    else:
+        del out
+        os.replace(tmp, sidecar)
+
+
+def load_csv(path, cache=True):
+    """Load a medida*.csv capture as a complex64 array of shape (frames, bins).
+
+    With ``cache`` the parsed array is stored in a .npy sidecar under
+    ``CACHE_DIR`` keyed by the file's size and mtime, and returned
+    memory-mapped; later loads skip parsing entirely.
+    """
+    if not cache:
+        with open(path, "rb") as f:
+            f.readline()
+            return parse_csv_rows(f.read())
+    sidecar = sidecar_path(path)
+    if not os.path.exists(sidecar):
+        try:
+            _build_sidecar(path, sidecar)
+        except OSError:
+            return load_csv(path, cache=False)
+    return np.load(sidecar, mmap_mode="r")
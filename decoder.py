@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+# base of the radar's vendor-specific service and characteristic UUIDs
+UUID_SUFFIX = "-8e22-4541-9d4c-21edae82ed19"
+
+
+def characteristic_uuid(short):
+    return f"0000{short:04x}{UUID_SUFFIX}"
+
+
+@dataclass(frozen=True)
+class FrameFormat:
+    name: str
+    dtype: np.dtype
+    # factor that turns payload integers into float amplitudes
+    scale: float = 2**-15
+
+    @property
+    def size(self):
+        return self.dtype.itemsize
+
+
+# 120 int16 (interleaved Re/Im range bins), ramp counter, 5 bytes padding
+RANGE_FRAME = FrameFormat(
+    "range", np.dtype([("payload", "<i2", (120,)), ("ramp", "<u2"), ("pad", "V5")])
+)
+# 60 int32 q16.15 (interleaved I/Q samples), 7 bytes padding
+IQ_FRAME = FrameFormat("iq", np.dtype([("payload", "<i4", (60,)), ("pad", "V7")]))
+# range bin of payload[0:2] in a RANGE_FRAME
+PAYLOAD_FIRST_BIN = 10
+
+# Multi-frame notifications of ramp formats: a BATCH_HEADER, then
+# ``count`` records of a ramp counter and ``bin_no`` interleaved Re/Im
+# bins from range bin ``bin_start`` on. A notification of exactly the
+# frame size is a legacy single frame; a batch never has that length.
+BATCH_MAGIC = 0xA5
+BATCH_HEADER = np.dtype([("magic", "u1"), ("count", "u1"), ("bin_start", "u1"), ("bin_no", "u1")])
+# the frame count is one byte
+MAX_BATCH_FRAMES = 255
+
+
+@lru_cache(maxsize=None)
+def batch_record_dtype(bin_no):
+    return np.dtype([("ramp", "<u2"), ("payload", "<i2", (2 * bin_no,))])
+
+
+def encode_batch(frames, bin_start=PAYLOAD_FIRST_BIN, bin_no=20):
+    """Pack 1 to ``MAX_BATCH_FRAMES`` RANGE_FRAME records into one multi-frame notification."""
+    if not 1 <= len(frames) <= MAX_BATCH_FRAMES:
+        raise ValueError(f"a multi-frame notification carries 1 to {MAX_BATCH_FRAMES} frames, not {len(frames)}")
+    lo = 2 * (bin_start - PAYLOAD_FIRST_BIN)
+    records = np.empty(len(frames), dtype=batch_record_dtype(bin_no))
+    records["ramp"] = frames["ramp"]
+    records["payload"] = frames["payload"][:, lo : lo + 2 * bin_no]
+    header = np.array([(BATCH_MAGIC, len(frames), bin_start, bin_no)], dtype=BATCH_HEADER)
+    return header.tobytes() + records.tobytes()
+
+FRAME_FORMATS = {fmt.name: fmt for fmt in (RANGE_FRAME, IQ_FRAME)}
+
+_formats_by_uuid = {
+    characteristic_uuid(0x00F0): RANGE_FRAME,
+    characteristic_uuid(0x00F1): RANGE_FRAME,
+}
+
+
+def register_format(uuid, fmt):
+    _formats_by_uuid[uuid.lower()] = fmt
+
+
+def format_for(uuid):
+    return _formats_by_uuid[uuid.lower()]
+
+
+def known_characteristics():
+    return list(_formats_by_uuid)
+
+
+class FrameDecoder:
+    """Decodes notification payloads as views over the received bytes.
+
+    Packets whose length does not match the frame format are counted in
+    ``malformed`` and skipped, so a bad notification never raises inside
+    a Qt slot.
+    """
+
+    def __init__(self, fmt):
+        self.format = fmt
+        self.decoded = 0
+        self.malformed = 0
+
+    def decode(self, data):
+        if len(data) != self.format.size:
+            self.malformed += 1
+            return None
+        self.decoded += 1
+        return np.frombuffer(data, dtype=self.format.dtype)[0]
+
+    def frame_ramps(self, data):
+        """``(frames, ramps)`` of a notification without decoding its payload.
+
+        ``ramps`` is None for formats without a ramp counter; a packet that
+        is not a notification of this format has no frames.
+        """
+        has_ramp = "ramp" in self.format.dtype.names
+        if len(data) == self.format.size:
+            return 1, np.frombuffer(data, dtype=self.format.dtype)["ramp"] if has_ramp else None
+        header = BATCH_HEADER.itemsize
+        if not has_ramp or len(data) < header or data[0] != BATCH_MAGIC:
+            return 0, None
+        dtype = batch_record_dtype(data[3])
+        if len(data) != header + data[1] * dtype.itemsize:
+            return 0, None
+        return data[1], np.frombuffer(data, dtype=dtype, count=data[1], offset=header)["ramp"]
+
+    def decode_frames(self, data):
+        """All frames of a legacy or multi-frame notification, None if malformed.
+
+        A legacy frame stays a view over ``data``; a batch is unpacked
+        into frames of the regular format in one vectorized copy, with
+        the bins it does not carry left at zero.
+        """
+        if len(data) == self.format.size:
+            self.decoded += 1
+            return np.frombuffer(data, dtype=self.format.dtype)
+        header = BATCH_HEADER.itemsize
+        if len(data) < header or data[0] != BATCH_MAGIC or "ramp" not in self.format.dtype.names:
+            self.malformed += 1
+            return None
+        count, bin_start, bin_no = data[1], data[2], data[3]
+        dtype = batch_record_dtype(bin_no)
+        lo = 2 * (bin_start - PAYLOAD_FIRST_BIN)
+        width = self.format.dtype["payload"].shape[0]
+        if count == 0 or len(data) != header + count * dtype.itemsize or lo < 0 or lo + 2 * bin_no > width:
+            self.malformed += 1
+            return None
+        records = np.frombuffer(data, dtype=dtype, count=count, offset=header)
+        frames = np.zeros(count, dtype=self.format.dtype)
+        frames["ramp"] = records["ramp"]
+        frames["payload"][:, lo : lo + 2 * bin_no] = records["payload"]
+        self.decoded += count
+        return frames
@@ -0,0 +1,63 @@
+"""Radars seen before, and finding one without a full BLE discovery."""
+import json
+import os
+import time
+
+from decoder import UUID_SUFFIX
+
+CACHE_PATH = os.path.join(os.path.expanduser("~"), ".epsilon_devices.json")
+SCAN_TIMEOUT = 10.0
+# seconds between reconnection attempts; the last one repeats
+RECONNECT_DELAYS = (0.5, 1.0, 2.0, 4.0, 8.0)
+
+
+class DeviceCache:
+    """Addresses and names of radars connected before, persisted as JSON."""
+
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.devices = {}
+        try:
+            with open(path) as f:
+                self.devices = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def __iter__(self):
+        # most recently used first
+        return iter(sorted(self.devices, key=lambda a: -self.devices[a]["last_used"]))
+
+    def __contains__(self, address):
+        return address in self.devices
+
+    def name(self, address):
+        return self.devices.get(address, {}).get("name") or address
+
+    def remember(self, address, name=None):
+        self.devices[address] = {"name": name or self.name(address), "last_used": time.time()}
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.devices, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            # a read-only home only costs the next scan
+            pass
+
+
+def is_radar(advertisement):
+    return any(uuid.lower().endswith(UUID_SUFFIX) for uuid in advertisement.service_uuids)
+
+
+async def find_radar(cache=None, timeout=SCAN_TIMEOUT):
+    """First device advertising the radar's services, or a cached one.
+
+    The scan ends at the first match instead of running a full
+    discovery; None if nothing turned up within ``timeout``.
+    """
+    from bleak import BleakScanner
+
+    return await BleakScanner.find_device_by_filter(
+        lambda device, advertisement: is_radar(advertisement) or (cache is not None and device.address in cache),
+        timeout,
+    )
@@ -0,0 +1,243 @@
+import argparse
+
+import numpy as np
+
+
+class SpectrogramBuffer:
+    """Circular spectrogram history with a write cursor.
+
+    Every column is written twice, at ``pos`` and ``pos + history``, so the
+    last ``history`` columns are always a contiguous slice of the backing
+    array and can be handed to pyqtgraph without rolling or copying.
+    """
+
+    def __init__(self, height, history, dtype=np.float64):
+        self.height = height
+        self.history = history
+        self._buf = np.zeros((2 * history, height), dtype=dtype)
+        self._pos = 0
+
+    def append(self, column):
+        self._buf[self._pos] = column
+        self._buf[self._pos + self.history] = column
+        self._pos = (self._pos + 1) % self.history
+
+    def extend(self, columns):
+        columns = np.asarray(columns)
+        n = columns.shape[0]
+        if n >= self.history:
+            columns = columns[n - self.history :]
+            n = self.history
+        end = self._pos + n
+        if end <= self.history:
+            self._buf[self._pos : end] = columns
+            self._buf[self._pos + self.history : end + self.history] = columns
+        else:
+            split = self.history - self._pos
+            self._buf[self._pos : self.history] = columns[:split]
+            self._buf[self._pos + self.history :] = columns[:split]
+            self._buf[: end - self.history] = columns[split:]
+            self._buf[self.history : end] = columns[split:]
+        self._pos = end % self.history
+
+    def clear(self):
+        self._buf.fill(0)
+        self._pos = 0
+
+    @property
+    def image(self):
+        # (history, height) view, oldest column first
+        return self._buf[self._pos : self._pos + self.history]
+
+
+class SlowTimeBuffer:
+    """The last ``ramps`` complex range profiles, placed by ramp number.
+
+    The uint16 ramp counter is unwrapped and ramp ``seq`` lives in row
+    ``seq % ramps``: a late packet still lands in its own row, and the
+    rows of dropped ramps are zeroed when the counter jumps past them.
+    ``windowed`` applies a slow-time window to the rows in time order
+    without moving them, by taking the window rotated to the oldest row
+    as a slice of a doubled copy.
+    """
+
+    def __init__(self, bins, ramps, window, modulo=1 << 16):
+        self.ramps = ramps
+        self.modulo = modulo
+        self.rows = np.zeros((ramps, bins), dtype=np.complex128)
+        self._window = np.concatenate([window, window])[:, None]
+        self._last = None
+        self._seq = 0
+
+    def push(self, ramp):
+        """Row for ``ramp``, or None when it is too late to fit the window."""
+        if self._last is None:
+            self._last = ramp
+            return 0
+        delta = (ramp - self._last) % self.modulo
+        if delta == 0:
+            return self._seq % self.ramps
+        if delta < self.modulo // 2:
+            self._zero(self._seq + 1, min(delta - 1, self.ramps))
+            self._seq += delta
+            self._last = ramp
+            return self._seq % self.ramps
+        late = self.modulo - delta
+        if late >= self.ramps:
+            return None
+        return (self._seq - late) % self.ramps
+
+    def _zero(self, first, count):
+        start = first % self.ramps
+        end = start + count
+        self.rows[start : min(end, self.ramps)] = 0
+        if end > self.ramps:
+            self.rows[: end - self.ramps] = 0
+
+    def clear(self):
+        self.rows.fill(0)
+        self._last = None
+        self._seq = 0
+
+    def windowed(self, out):
+        oldest = (self._seq + 1) % self.ramps
+        return np.multiply(self.rows, self._window[self.ramps - oldest : 2 * self.ramps - oldest], out=out)
+
+
+def stft_power(samples, window, hop=1):
+    """Power spectrum of every ``len(window)``-sample frame of ``samples``.
+
+    Frames start ``hop`` samples apart and are transformed in a single
+    batched FFT; the result has one row per frame.
+    """
+    n = len(window)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, n)[::hop]
+    spectrum = np.fft.fft(frames * window, axis=-1) / n
+    return np.abs(spectrum) ** 2
+
+
+def check_clutter_alpha(alpha):
+    # a negative weight never tracks the background, one above 1 diverges
+    if not 0 <= alpha < 1:
+        raise ValueError(f"the clutter moving-average weight must be in [0, 1), not {alpha}")
+
+
+def clutter_alpha(text):
+    """argparse type of --clutter-alpha, 0 turning the moving average off."""
+    try:
+        alpha = float(text)
+        check_clutter_alpha(alpha)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return alpha
+
+
+class ClutterFilter:
+    """Streaming static-clutter removal on complex range bins.
+
+    Subtracts a fixed background profile, e.g. the mean of a
+    background-only capture, or with ``background=None`` an exponential
+    moving average of the input updated with weight ``alpha``. All state
+    is preallocated; the returned array is reused between calls.
+    """
+
+    def __init__(self, bins, alpha=0.02, background=None):
+        check_clutter_alpha(alpha)
+        self.alpha = alpha
+        self.adaptive = background is None
+        self.background = np.zeros(bins, dtype=np.complex128)
+        if background is not None:
+            self.background[:] = background
+        self._primed = not self.adaptive
+        self._out = np.empty(bins, dtype=np.complex128)
+        self._step = np.empty(bins, dtype=np.complex128)
+
+    def reset(self):
+        self._primed = not self.adaptive
+        if self.adaptive:
+            self.background.fill(0)
+
+    def __call__(self, bins):
+        if not self._primed:
+            self.background[:] = bins
+            self._primed = True
+        np.subtract(bins, self.background, out=self._out)
+        if self.adaptive:
+            np.multiply(self._out, self.alpha, out=self._step)
+            self.background += self._step
+        return self._out
+
+
+class CaCfar:
+    """Cell-averaging CFAR detector over the last axis of a power profile.
+
+    The noise level of every cell is the mean of ``train`` cells on each
+    side beyond ``guard`` guard cells, taken from one cumulative sum, so
+    the cost is a handful of vectorized operations regardless of the
+    window sizes. Cells near the edges use whichever training cells exist.
+    """
+
+    def __init__(self, bins, guard=1, train=4, pfa=1e-3):
+        idx = np.arange(bins)
+        self._lead = (np.clip(idx - guard - train, 0, bins), np.clip(idx - guard, 0, bins))
+        self._lag = (np.clip(idx + guard + 1, 0, bins), np.clip(idx + guard + train + 1, 0, bins))
+        count = (self._lead[1] - self._lead[0]) + (self._lag[1] - self._lag[0])
+        self._count = np.maximum(count, 1)
+        n = 2 * train
+        self.scale = n * (pfa ** (-1 / n) - 1)
+
+    def threshold(self, power):
+        csum = np.zeros(power.shape[:-1] + (power.shape[-1] + 1,))
+        np.cumsum(power, axis=-1, out=csum[..., 1:])
+        noise = csum[..., self._lead[1]] - csum[..., self._lead[0]]
+        noise += csum[..., self._lag[1]] - csum[..., self._lag[0]]
+        return noise * (self.scale / self._count)
+
+    def detect(self, power):
+        """Indices of the cells above threshold that are also local peaks."""
+        hits = power > self.threshold(power)
+        peak = np.ones_like(hits)
+        peak[..., 1:] &= power[..., 1:] >= power[..., :-1]
+        peak[..., :-1] &= power[..., :-1] >= power[..., 1:]
+        return np.flatnonzero(hits & peak)
+
+
+class AlphaBetaTracker:
+    """Single-target alpha-beta range tracker fed with one ramp at a time.
+
+    The detection closest to the prediction within ``gate`` metres
+    updates the track; a track is started from the strongest detection
+    and dropped after ``max_misses`` ramps without one.
+    """
+
+    def __init__(self, alpha=0.5, beta=0.1, gate=0.5, max_misses=10):
+        self.alpha = alpha
+        self.beta = beta
+        self.gate = gate
+        self.max_misses = max_misses
+        self.distance = None
+        self.rate = 0.0
+        self.misses = 0
+
+    def update(self, distances, strengths=None):
+        if self.distance is None:
+            if len(distances):
+                best = np.argmax(strengths) if strengths is not None else 0
+                self.distance = float(distances[best])
+                self.rate = 0.0
+                self.misses = 0
+            return self.distance
+        predicted = self.distance + self.rate
+        if len(distances):
+            nearest = np.argmin(np.abs(distances - predicted))
+            residual = distances[nearest] - predicted
+        if len(distances) and abs(residual) <= self.gate:
+            self.distance = predicted + self.alpha * residual
+            self.rate += self.beta * residual
+            self.misses = 0
+        else:
+            self.distance = predicted
+            self.misses += 1
+            if self.misses > self.max_misses:
+                self.distance = None
+        return self.distance
@@ -0,0 +1,81 @@
+import collections
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+
+CAPACITY = 4096
+# events of a rate-limited kind shown per flush, the rest are only counted
+SHOWN_PER_FLUSH = 5
+
+
+@dataclass
+class Event:
+    time: float
+    kind: str
+    message: str
+    source: str = ""
+
+    def format(self):
+        source = f"[{self.source}] " if self.source else ""
+        return f"{time.ctime(self.time)}: {source}{self.message}"
+
+
+class EventLog:
+    """Bounded log of typed events, cheap enough to write per packet.
+
+    Writers append to a ring of ``capacity`` events; ``flush`` returns the
+    lines of everything logged since the previous flush in one batch,
+    showing at most ``shown`` events of each rate-limited kind and
+    summarising the rest. When ``path`` is given every event is also
+    appended to that file, unless the ring overran between flushes.
+    """
+
+    def __init__(self, capacity=CAPACITY, path=None, shown=SHOWN_PER_FLUSH, rate_limited=("packet",)):
+        self.events = collections.deque(maxlen=capacity)
+        self.shown = shown
+        self.rate_limited = set(rate_limited)
+        self.file = open(path, "a") if path else None
+        self._appended = 0
+        self._flushed = 0
+        self._bytes = collections.Counter()
+        self._lock = threading.Lock()
+
+    def log(self, message, kind="info", source=""):
+        with self._lock:
+            self.events.append(Event(time.time(), kind, message, source))
+            self._appended += 1
+
+    def packet(self, source, data):
+        with self._lock:
+            self.events.append(Event(time.time(), "packet", data.hex(), source))
+            self._appended += 1
+            self._bytes[source] += len(data)
+
+    def flush(self):
+        with self._lock:
+            new = min(self._appended - self._flushed, len(self.events))
+            dropped = self._appended - self._flushed - new
+            events = list(itertools.islice(self.events, len(self.events) - new, None))
+            nbytes, self._bytes = self._bytes, collections.Counter()
+            self._flushed = self._appended
+        lines = [f"{time.ctime()}: {dropped} events overwritten before display"] if dropped else []
+        if self.file is not None and (events or dropped):
+            self.file.write("".join(line + "\n" for line in lines + [e.format() for e in events]))
+            self.file.flush()
+        shown = collections.Counter()
+        for event in events:
+            shown[event.kind, event.source] += 1
+            if event.kind not in self.rate_limited or shown[event.kind, event.source] <= self.shown:
+                lines.append(event.format())
+        for (kind, source), n in shown.items():
+            if kind in self.rate_limited and n > self.shown:
+                size = f", {nbytes[source]} bytes in all" if kind == "packet" else ""
+                lines.append(f"{time.ctime()}: [{source}] {n - self.shown} more {kind} events{size}")
+        return lines
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
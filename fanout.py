@@ -0,0 +1,215 @@
+"""Fan-out of decoded frames to other processes on the same host.
+
+``SharedMemoryPublisher`` writes every frame into a ring in a named
+shared-memory segment that readers map and read in place;
+``SocketPublisher`` streams the same records over a Unix socket for
+readers that cannot share memory with the viewer. Neither ever waits
+for a reader: the ring is overwritten regardless, and each socket reader
+has its own bounded queue that drops its oldest records. ``subscriber.py``
+is the reading side.
+"""
+import collections
+import json
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+
+from recorder import pack_header
+from subscriber import ALIGN, HEADER, MAGIC, record_dtype, socket_path
+
+CAPACITY = 4096
+# records queued per socket reader before its oldest are dropped
+SOCKET_QUEUE = 4096
+
+
+def _meta(fmt, dtype):
+    return {"format": fmt.name, "dtype": dtype.descr, "created": time.time()}
+
+
+def _header(fmt, dtype, capacity):
+    meta = _meta(fmt, dtype)
+    meta_len = len(json.dumps(meta))
+    # the data offset is part of the JSON, leave room for its digits
+    meta["data_offset"] = -(-(HEADER.itemsize + meta_len + 32) // ALIGN) * ALIGN
+    text = json.dumps(meta).encode()
+    header = np.zeros((), dtype=HEADER)
+    header["magic"] = MAGIC
+    header["header_len"] = len(text)
+    header["capacity"] = capacity
+    header["record_size"] = dtype.itemsize
+    return header, text, meta["data_offset"]
+
+
+class SharedMemoryPublisher:
+    """Ring of the last ``capacity`` frames in shared memory ``name``.
+
+    Each slot carries a sequence number that is odd while the slot is
+    being written, so readers can tell a record the writer lapped while
+    they read it. A segment left behind by a crashed viewer is replaced.
+    """
+
+    def __init__(self, name, fmt, capacity=CAPACITY):
+        from multiprocessing import shared_memory
+
+        self.name = name
+        self.dtype = record_dtype(fmt.dtype)
+        header, text, data_offset = _header(fmt, self.dtype, capacity)
+        size = data_offset + capacity * self.dtype.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        buf = self._shm.buf
+        # fault the pages in now rather than on the DSP thread's first lap
+        np.ndarray((size,), dtype=np.uint8, buffer=buf).fill(0)
+        buf[HEADER.itemsize : HEADER.itemsize + len(text)] = text
+        self.ring = np.ndarray((capacity,), dtype=self.dtype, buffer=buf, offset=data_offset)
+        self.capacity = capacity
+        self.written = 0
+        self._seq, self._t, self._ramp, self._frame = (self.ring[f] for f in self.dtype.names)
+        # the magic goes in last, readers attaching earlier are turned away
+        self._header = np.ndarray((), dtype=HEADER, buffer=buf)
+        self._header[()] = header
+
+    def publish(self, frame, t, ramp):
+        n = self.written
+        slot = n % self.capacity
+        self._seq[slot] = 2 * n + 1
+        self._t[slot] = t
+        self._ramp[slot] = ramp
+        self._frame[slot] = frame
+        self._seq[slot] = 2 * n + 2
+        self.written = n + 1
+        self._header["written"] = n + 1
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._header["closed"] = 1
+        self._header = self.ring = self._seq = self._t = self._ramp = self._frame = None
+        self._shm.close()
+        # readers still attached keep their mapping until they close it
+        self._shm.unlink()
+        self._shm = None
+
+
+class _Reader:
+    def __init__(self, conn, maxlen):
+        self.conn = conn
+        self.queue = collections.deque(maxlen=maxlen)
+        self.ready = threading.Event()
+        self.alive = True
+
+
+class SocketPublisher:
+    """Streams frame records to every reader of the Unix socket at ``path``.
+
+    A reader gets ``MAGIC``, a uint32 header length, the JSON header and
+    then records of ``record_dtype`` numbered like the shared ring, sent
+    from a thread per reader so a stalled one only loses its own records.
+    """
+
+    def __init__(self, path, fmt, queue_len=SOCKET_QUEUE):
+        self.path = path
+        self.dtype = record_dtype(fmt.dtype)
+        self._greeting = pack_header(MAGIC, _meta(fmt, self.dtype), align=1)
+        self._queue_len = queue_len
+        self._record = np.zeros(1, dtype=self.dtype)
+        self._readers = []
+        self.written = 0
+        if os.path.exists(path):
+            os.remove(path)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen()
+        threading.Thread(target=self._accept, name="publisher", daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            reader = _Reader(conn, self._queue_len)
+            threading.Thread(target=self._send, args=(reader,), name="subscriber", daemon=True).start()
+            self._readers = self._readers + [reader]
+
+    def _send(self, reader):
+        try:
+            reader.conn.sendall(self._greeting)
+            while reader.alive:
+                reader.ready.wait()
+                reader.ready.clear()
+                batch = []
+                while reader.queue:
+                    batch.append(reader.queue.popleft())
+                reader.conn.sendall(b"".join(batch))
+        except OSError:
+            pass
+        reader.alive = False
+        reader.conn.close()
+        self._readers = [r for r in self._readers if r is not reader]
+
+    def publish(self, frame, t, ramp):
+        n = self.written
+        self.written = n + 1
+        if not self._readers:
+            return
+        record = self._record[0]
+        record["seq"] = 2 * n + 2
+        record["t"] = t
+        record["ramp"] = ramp
+        record["frame"] = frame
+        data = self._record.tobytes()
+        for reader in self._readers:
+            reader.queue.append(data)
+            reader.ready.set()
+
+    def close(self):
+        self._server.close()
+        for reader in self._readers:
+            reader.alive = False
+            reader.ready.set()
+            try:
+                reader.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def make_publisher(name, fmt, transport="auto"):
+    """Publisher of ``fmt`` frames as ``name``: "shm", "socket", or shared memory when available."""
+    if transport != "socket":
+        try:
+            return SharedMemoryPublisher(name, fmt)
+        except (ImportError, OSError):
+            if transport == "shm":
+                raise
+    return SocketPublisher(socket_path(name), fmt)
+
+
+class PublishStage:
+    """StreamGraph stage handing every decoded frame to a publisher.
+
+    Frames are stamped with the time they were decoded; formats without
+    a ramp counter are numbered in arrival order.
+    """
+
+    def __init__(self, publisher):
+        self.publisher = publisher
+        self._has_ramp = "ramp" in publisher.dtype["frame"].names
+
+    def process_frame(self, frame):
+        ramp = frame["ramp"] if self._has_ramp else self.publisher.written
+        self.publisher.publish(frame, time.time(), ramp)
+        return False
+
+    def result(self):
+        return self.publisher.written
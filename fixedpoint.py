@@ -0,0 +1,103 @@
+"""Fixed-point DSP backend running the firmware's CMSIS-DSP kernels.
+
+The radar firmware converts, takes magnitudes, FFTs and logs in q15 or
+q31 with CMSIS-DSP. The cmsisdsp package wraps the same C kernels, so on
+the host this backend reproduces the firmware's integer results,
+including its rounding, saturation and FFT down-scaling; only the final
+affine conversion to dB is done in floating point. Inputs are complex
+values in payload counts (q15 LSBs) like everywhere else; q31 carries 16
+extra fractional bits through the chain.
+
+cmsisdsp is imported when a backend is created, so the numpy path never
+pays for it. ``bench.py`` times both backends per operation.
+"""
+import math
+
+import numpy as np
+
+# dB per neper, for turning the natural logs of arm_vlog into dB
+DB_PER_NEPER = 20 / math.log(10)
+# fractional bits of arm_vlog_q15 (5.11) and arm_vlog_q31 (5.26) results
+LOG_FRACTION = {15: 11, 31: 26}
+
+
+class FixedPointBackend:
+    def __init__(self, bits=15, floor=1e-3):
+        import cmsisdsp
+
+        if bits not in LOG_FRACTION:
+            raise ValueError(f"no q{bits} kernels, use 15 or 31")
+        self.name = f"q{bits}"
+        self.bits = bits
+        self.floor_db = DB_PER_NEPER * math.log(floor)
+        self._dsp = cmsisdsp
+        self._dtype = np.int16 if bits == 15 else np.int32
+        self._shift = bits - 15
+        self._q15_to_float = cmsisdsp.arm_q15_to_float
+        self._q31_to_float = cmsisdsp.arm_q31_to_float
+        self._mag = cmsisdsp.arm_cmplx_mag_q15 if bits == 15 else cmsisdsp.arm_cmplx_mag_q31
+        self._log = cmsisdsp.arm_vlog_q15 if bits == 15 else cmsisdsp.arm_vlog_q31
+        self._cfft = cmsisdsp.arm_cfft_q15 if bits == 15 else cmsisdsp.arm_cfft_q31
+        self._ffts = {}
+
+    def quantize(self, z):
+        """Complex counts as saturated, interleaved re/im fixed-point samples."""
+        z = np.asarray(z)
+        q = np.empty(z.shape[:-1] + (2 * z.shape[-1],))
+        q[..., 0::2] = z.real
+        q[..., 1::2] = z.imag
+        q *= 1 << self._shift
+        info = np.iinfo(self._dtype)
+        return np.clip(np.rint(q, out=q), info.min, info.max, out=q).astype(self._dtype)
+
+    def to_float(self, q):
+        """Payload counts as float32 ``q / 2**15``, through the conversion kernels.
+
+        int16 range payloads are q15 samples, widened to q31 first by the
+        q31 backend. int32 iq payloads are q16.15, which arm_q31_to_float
+        reads as q31, 2**16 times too small.
+        """
+        q = np.asarray(q)
+        flat = np.ascontiguousarray(q).ravel()
+        if q.dtype == np.int16 and self.bits == 15:
+            return self._q15_to_float(flat).reshape(q.shape)
+        if q.dtype == np.int16:
+            return self._q31_to_float(self._dsp.arm_q15_to_q31(flat)).reshape(q.shape)
+        if q.dtype == np.int32:
+            return (self._q31_to_float(flat) * (1 << 16)).reshape(q.shape)
+        raise ValueError(f"no fixed-point conversion of {q.dtype} payloads")
+
+    def _magnitude_db(self, q, gain_db=0.0):
+        # arm_cmplx_mag leaves |z| / 2 in q15/q31, arm_vlog then gives
+        # ln(|z| / 2**16) in counts whatever the word size
+        magnitude = self._mag(q.ravel())
+        log = self._log(magnitude) * (1.0 / (1 << LOG_FRACTION[self.bits]))
+        db = (log + 16 * math.log(2)) * DB_PER_NEPER + gain_db
+        # arm_vlog saturates rather than returning -inf for 0
+        db[magnitude == 0] = self.floor_db
+        return np.maximum(db, self.floor_db, out=db)
+
+    def db(self, z):
+        z = np.asarray(z)
+        return self._magnitude_db(self.quantize(z)).reshape(z.shape)
+
+    def check_fft_length(self, n):
+        if n & (n - 1) or not 16 <= n <= 4096:
+            raise ValueError(f"the {self.name} backend's CMSIS-DSP FFTs take 16 to 4096 points in powers of two, not {n}")
+
+    def fft_db(self, x, gain, out, spectrum=None):
+        """dB magnitude of the FFT of ``x`` along axis 0, times ``gain``.
+
+        ``spectrum`` is the numpy backend's scratch, the kernels have their own.
+        """
+        n = len(x)
+        fft = self._ffts.get(n)
+        if fft is None:
+            self.check_fft_length(n)
+            fft = self._ffts[n] = getattr(self._dsp, f"arm_cfft_instance_q{self.bits}")()
+            getattr(self._dsp, f"arm_cfft_init_q{self.bits}")(fft, n)
+        # one transform per range bin; the kernel scales its output by 1 / n
+        spectra = np.stack([self._cfft(fft, row, 0, 1) for row in self.quantize(x.T)])
+        db = self._magnitude_db(spectra, DB_PER_NEPER * math.log(n * gain))
+        out[...] = db.reshape(x.shape[1], n).T
+        return out
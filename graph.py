@@ -0,0 +1,72 @@
+import time
+
+from decoder import FrameDecoder
+from telemetry import StreamTelemetry
+
+
+def process_notification(processor, byteobj, on_frame=None, arrival=None):
+    """Decode a notification and run ``processor.process_frame`` on each of its frames.
+
+    Legacy notifications carry one frame, multi-frame ones several, all
+    decoded in one call. ``on_frame`` is called after every frame that
+    updated the processor, for consumers that want each result.
+    ``arrival`` is when the notification was received, for the interval
+    and jitter telemetry; it defaults to now.
+    """
+    start = time.perf_counter()
+    frames = processor.decoder.decode_frames(byteobj)
+    if frames is None:
+        processor.telemetry.on_malformed()
+        return False
+    ramps = frames["ramp"].tolist() if "ramp" in frames.dtype.names else [None]
+    processor.telemetry.on_packet(ramps[0], start if arrival is None else arrival, len(frames))
+    processor.telemetry.on_ramps(ramps[1:])
+    updated = False
+    for frame in frames:
+        if processor.process_frame(frame):
+            updated = True
+            if on_frame is not None:
+                on_frame()
+    processor.telemetry.on_decode(time.perf_counter() - start)
+    return updated
+
+
+class StreamGraph:
+    """Decodes each notification once and feeds the frame to every stage.
+
+    Every decoded frame is shared by all stages without copying; a
+    multi-frame notification runs the stages once per frame. A stage implements ``process_frame(frame)``,
+    returning whether it has a new result, and ``result()``. The graph
+    itself is a ``DspPipeline`` processor whose result maps each stage
+    name to that stage's newest result.
+    """
+
+    def __init__(self, fmt, telemetry=None):
+        self.decoder = FrameDecoder(fmt)
+        self.telemetry = telemetry or StreamTelemetry()
+        self.stages = {}
+        self._ready = set()
+
+    @property
+    def format(self):
+        return self.decoder.format
+
+    def add_stage(self, name, stage):
+        self.stages[name] = stage
+        return stage
+
+    def process(self, byteobj, arrival=None):
+        return process_notification(self, byteobj, arrival=arrival)
+
+    def process_frame(self, frame):
+        updated = False
+        for name, stage in self.stages.items():
+            if stage.process_frame(frame):
+                self._ready.add(name)
+                updated = True
+        return updated
+
+    def result(self):
+        # every stage that has produced something, so that coalescing in
+        # the pipeline never drops a stage that did not update last
+        return {name: self.stages[name].result() for name in self._ready}
@@ -0,0 +1,213 @@
+"""Headless acquisition and processing, without Qt, pyqtgraph or matplotlib.
+
+Connects to a radar (or replays / simulates one), decodes every
+notification, runs the range or micro-Doppler processing and streams the
+results as JSON lines to stdout or a file, optionally recording the raw
+frames as well.
+
+    python headless.py --address 00:80:e1:21:cc:89 --mode range --duration 60
+    python headless.py --replay medida01_andar_acercando_radar.csv --speed 0 --output -
+    python headless.py --simulate 1000 --mode doppler --quiet
+    python headless.py --replay medida04_andando_en_el_sitiomirandoradar.csv --mode activity --activity-model activity.npz
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from functools import partial
+
+from activity import ActivityStage, GaussianNaiveBayes
+from decoder import FRAME_FORMATS, characteristic_uuid, format_for
+from dsp import AlphaBetaTracker, CaCfar, ClutterFilter, clutter_alpha
+from graph import StreamGraph, process_notification
+from processing import BACKENDS, BIN_NO, X_DIM, DopplerProcessor, RangeProcessor, load_background, make_backend
+from recorder import SessionRecorder, recording_summary
+from replay import DEFAULT_FRAME_RATE, ReplayStream, pack_size
+
+logger = logging.getLogger(__name__)
+
+_END = None
+
+
+async def run_ble_source(address, char_uuid, queue, duration):
+    from bleak import BleakClient
+
+    def callback_handler(_, data):
+        queue.put_nowait((time.time(), data))
+
+    async with BleakClient(address) as client:
+        logger.info(f"Connected: {client.is_connected}")
+        await client.start_notify(char_uuid, callback_handler)
+        if duration:
+            await asyncio.sleep(duration)
+        else:
+            await asyncio.Event().wait()
+        await client.stop_notify(char_uuid)
+    await queue.put((time.time(), _END))
+
+
+async def run_replay_source(stream, queue):
+    await stream.run(lambda data: queue.put_nowait((time.time(), data)), queue.qsize)
+    logger.info(f"Replay done, {stream.emitted} frames at {stream.frames_per_second:.0f} frames/s")
+    await queue.put((time.time(), _END))
+
+
+def range_record(epoch, processor):
+    lindata, peaks, track = processor.result()
+    record = {"t": epoch, "db": [round(float(v), 2) for v in lindata]}
+    if processor.detector is not None:
+        record["detections_m"] = [round(float(d), 3) for d in processor.distances[peaks]]
+        record["track_m"] = None if track is None else round(track, 3)
+    return record
+
+
+def doppler_record(epoch, processor):
+    return {"t": epoch, "power": processor.columns.round(9).tolist()}
+
+
+def activity_record(epoch, graph):
+    stage = graph.stages["activity"]
+    if not stage.updated:
+        return None
+    return {"t": epoch, "activity": stage.label, "p": round(stage.probability, 3)}
+
+
+def write_record(out, make_record, epoch, processor):
+    record = make_record(epoch, processor)
+    if record is not None:
+        out.write(json.dumps(record) + "\n")
+
+
+async def run_queue_consumer(queue, processor, make_record, out, recorder, stats_interval):
+    next_stats = time.perf_counter() + stats_interval
+    while True:
+        epoch, data = await queue.get()
+        if data is _END:
+            break
+        if recorder is not None:
+            recorder.write(data, epoch)
+        # one record per frame, also for multi-frame notifications
+        process_notification(processor, data, None if out is None else partial(write_record, out, make_record, epoch, processor), epoch)
+        if stats_interval and time.perf_counter() >= next_stats:
+            next_stats += stats_interval
+            logger.info(json.dumps(processor.telemetry.snapshot()))
+    if out is not None:
+        out.flush()
+
+
+def build_processor(args, fmt):
+    backend = make_backend(args.dsp_backend)
+    if args.mode == "doppler":
+        return DopplerProcessor(X_DIM, fmt=fmt, backend=backend), doppler_record
+    if args.mode == "activity":
+        if not args.activity_model:
+            raise SystemExit("--mode activity needs --activity-model")
+        graph = StreamGraph(fmt)
+        doppler = graph.add_stage("doppler", DopplerProcessor(X_DIM, graph.telemetry, fmt, backend))
+        graph.add_stage("activity", ActivityStage(GaussianNaiveBayes.load(args.activity_model), doppler))
+        return graph, activity_record
+    clutter = None
+    if args.background:
+        clutter = ClutterFilter(BIN_NO, background=load_background(args.background))
+    elif args.clutter_alpha > 0:
+        clutter = ClutterFilter(BIN_NO, alpha=args.clutter_alpha)
+    processor = RangeProcessor(fmt, clutter=clutter, backend=backend)
+    if args.cfar:
+        processor.detector = CaCfar(BIN_NO, args.cfar_guard, args.cfar_train, args.cfar_pfa)
+        processor.tracker = AlphaBetaTracker()
+    return processor, range_record
+
+
+async def main(args):
+    char_uuid = characteristic_uuid(int(args.characteristic, 16))
+    if args.replay:
+        source = ReplayStream(args.replay, args.speed, args.rate, pack=args.pack)
+    elif args.simulate:
+        fmt = FRAME_FORMATS["iq" if args.mode == "doppler" else "range"]
+        source = ReplayStream.simulated(fmt, args.simulate, args.speed, args.rate, pack=args.pack)
+    else:
+        source = None
+    if source is not None:
+        fmt = source.format
+    elif args.mode == "doppler":
+        fmt = FRAME_FORMATS["iq"]
+    else:
+        fmt = format_for(char_uuid)
+
+    processor, make_record = build_processor(args, fmt)
+    if processor.decoder.format is not fmt:
+        raise SystemExit(f"{args.mode} processing needs {processor.decoder.format.name} frames, got {fmt.name}")
+
+    recorder = None
+    if args.record:
+        recorder = SessionRecorder(args.record, fmt)
+        recorder.start()
+    out = None
+    if not args.quiet:
+        out = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    queue = asyncio.Queue()
+    if source is not None:
+        producer = run_replay_source(source, queue)
+    else:
+        producer = run_ble_source(args.address, char_uuid, queue, args.duration)
+    consumer = run_queue_consumer(queue, processor, make_record, out, recorder, args.stats_interval)
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(producer, consumer)
+    finally:
+        if recorder is not None:
+            recorder.close()
+            logger.info(recording_summary(recorder))
+        if out is not None and out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+    snapshot = processor.telemetry.snapshot()
+    logger.info(
+        f"{processor.telemetry.frames} frames in {processor.telemetry.packets} notifications in {elapsed:.2f} s "
+        f"({processor.telemetry.frames / elapsed:.0f} frames/s), "
+        f"{snapshot['ramps_dropped']} ramps dropped, {snapshot['malformed']} malformed"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--address", help="BLE address of the radar")
+    source.add_argument("--replay", metavar="PATH", help="medida*.csv capture or binary recording")
+    source.add_argument("--simulate", type=int, metavar="FRAMES", help="synthetic source with this many frames")
+    parser.add_argument("--characteristic", default="0x00f0", help="notification characteristic, e.g. 0x00f1")
+    parser.add_argument("--mode", choices=("range", "doppler", "activity"), default="range")
+    parser.add_argument("--duration", type=float, default=0, help="seconds to stream from the radar, 0 for no limit")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--pack", type=pack_size, default=1, help="replay range frames this many per multi-frame notification")
+    parser.add_argument("--rate", type=float, default=DEFAULT_FRAME_RATE, help="ramp rate of CSV and simulated sources")
+    parser.add_argument("--output", default="-", help="JSON-lines results file, - for stdout")
+    parser.add_argument("--quiet", action="store_true", help="do not write per-frame results")
+    parser.add_argument("--record", metavar="PATH", help="record raw frames to a binary session file")
+    parser.add_argument("--stats-interval", type=float, default=0, help="log telemetry every N seconds")
+    parser.add_argument("--background", metavar="PATH", help="subtract the mean range profile of a background capture")
+    parser.add_argument("--clutter-alpha", type=clutter_alpha, default=0.0, help="subtract a moving-average background")
+    parser.add_argument("--cfar", action="store_true", help="detect and track targets with CA-CFAR")
+    parser.add_argument("--cfar-guard", type=int, default=1)
+    parser.add_argument("--cfar-train", type=int, default=4)
+    parser.add_argument("--cfar-pfa", type=float, default=1e-3)
+    parser.add_argument("--activity-model", metavar="PATH", help="model from activity.py train, for --mode activity")
+    parser.add_argument("--dsp-backend", choices=BACKENDS, default="numpy", help="float numpy, or the firmware's q15/q31 CMSIS-DSP kernels")
+    args = parser.parse_args(argv)
+    if args.cfar_train < 1:
+        parser.error("--cfar-train must be at least 1")
+    return args
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # stdout consumer went away, e.g. piped into head
+        sys.stdout = None
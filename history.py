@@ -0,0 +1,161 @@
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+
+FACTOR = 4
+# columns added to a level file whenever it runs out of room
+GROW = 1 << 14
+
+
+class _LevelFile:
+    """Append-only (columns, height) float32 array in a memory-mapped file."""
+
+    def __init__(self, path, height, length=0, mode="w+"):
+        self.path = path
+        self.height = height
+        self.length = length
+        self.writable = mode != "r"
+        if self.writable:
+            with open(path, "ab") as f:
+                f.truncate(max(length, GROW) * height * 4)
+        self._map()
+
+    def _map(self):
+        columns = os.path.getsize(self.path) // (self.height * 4)
+        if columns == 0:
+            self.data = np.empty((0, self.height), dtype=np.float32)
+            return
+        mode = "r+" if self.writable else "r"
+        self.data = np.memmap(self.path, dtype=np.float32, mode=mode, shape=(columns, self.height))
+
+    def append(self, columns):
+        end = self.length + len(columns)
+        if end > len(self.data):
+            self.data.flush()
+            with open(self.path, "r+b") as f:
+                f.truncate(-(-end // GROW) * GROW * self.height * 4)
+            # views handed out earlier keep the old, shorter mapping
+            self._map()
+        self.data[self.length : end] = columns
+        self.length = end
+
+    def close(self):
+        if self.writable:
+            self.data.flush()
+            self.data = None
+            with open(self.path, "r+b") as f:
+                f.truncate(self.length * self.height * 4)
+
+
+class HistoryPyramid:
+    """Unbounded spectrogram history with decimated levels on disk.
+
+    Level 0 holds every column; level ``k`` pools groups of ``factor``
+    columns of level ``k - 1`` with ``pool`` (max keeps short micro-Doppler
+    bursts visible, mean keeps energy). Levels live in memory-mapped files
+    next to ``path`` (a temporary file when None), so RAM use does not
+    grow with the session; ``window`` returns the coarsest useful level
+    for a time span so a view never uploads much more than its width.
+    """
+
+    def __init__(self, height, path=None, factor=FACTOR, pool="max"):
+        self.height = height
+        self.factor = factor
+        self.pool = pool
+        self._temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="epsilon-history-")
+            os.close(fd)
+        self.path = path
+        self.levels = [_LevelFile(self._level_path(0), height)]
+
+    @classmethod
+    def open(cls, path):
+        """Read-only pyramid of a finished session."""
+        with open(path) as f:
+            meta = json.load(f)
+        pyramid = cls.__new__(cls)
+        pyramid.height = meta["height"]
+        pyramid.factor = meta["factor"]
+        pyramid.pool = meta["pool"]
+        pyramid.path = path
+        pyramid._temporary = False
+        pyramid.levels = [
+            _LevelFile(pyramid._level_path(k), pyramid.height, n, mode="r") for k, n in enumerate(meta["lengths"])
+        ]
+        return pyramid
+
+    def _level_path(self, level):
+        return f"{self.path}.L{level}"
+
+    def __len__(self):
+        return self.levels[0].length
+
+    def append(self, columns):
+        columns = np.atleast_2d(columns)
+        self.levels[0].append(columns)
+        for k in range(len(self.levels)):
+            below = self.levels[k]
+            groups = below.length // self.factor
+            if k + 1 == len(self.levels):
+                if groups == 0:
+                    break
+                self.levels.append(_LevelFile(self._level_path(k + 1), self.height))
+            above = self.levels[k + 1]
+            if groups == above.length:
+                break
+            block = below.data[above.length * self.factor : groups * self.factor]
+            block = block.reshape(-1, self.factor, self.height)
+            above.append(block.max(axis=1) if self.pool == "max" else block.mean(axis=1))
+
+    def level_for(self, span, max_columns):
+        """Smallest level at which ``span`` level-0 columns fit in ``max_columns``."""
+        if span <= max_columns:
+            return 0
+        level = math.ceil(math.log(span / max_columns, self.factor))
+        return min(level, len(self.levels) - 1)
+
+    def window(self, start, stop, max_columns):
+        """Columns covering level-0 range [start, stop) at most ``max_columns`` wide.
+
+        Returns ``(image, first, scale)``: the image starts at level-0
+        column ``first`` and every image column stands for ``scale``
+        level-0 columns. The newest, not yet pooled, columns are left out
+        of coarse levels.
+        """
+        start, stop = max(int(start), 0), min(int(math.ceil(stop)), len(self))
+        level = self.level_for(max(stop - start, 1), max_columns)
+        scale = self.factor**level
+        store = self.levels[level]
+        lo, hi = start // scale, min(-(-stop // scale), store.length)
+        return store.data[lo:max(hi, lo)], lo * scale, scale
+
+    def close(self):
+        lengths = [level.length for level in self.levels]
+        for level in self.levels:
+            level.close()
+        if self._temporary:
+            for k in range(len(self.levels)):
+                os.remove(self._level_path(k))
+            os.remove(self.path)
+            return
+        with open(self.path, "w") as f:
+            json.dump({"height": self.height, "factor": self.factor, "pool": self.pool, "lengths": lengths}, f)
+
+
+class HistoryStage:
+    """StreamGraph stage appending a DopplerProcessor's columns to a pyramid."""
+
+    def __init__(self, pyramid, doppler):
+        self.pyramid = pyramid
+        self.doppler = doppler
+
+    def process_frame(self, frame):
+        self.pyramid.append(self.doppler.columns)
+        return True
+
+    def result(self):
+        return len(self.pyramid)
@@ -1,125 +1,129 @@
-from ast import Mult
+import startup
+import argparse
+import os
 import sys
-import matplotlib
-import time
-from matplotlib.ticker import (
-    MultipleLocator,
-    AutoMinorLocator,
-    AutoLocator,
-    FormatStrFormatter,
-)
-import numpy as np
-from scipy.constants import speed_of_light
 from dataclasses import dataclass
-from functools import cached_property
-from struct import unpack
-from cmsisdsp import arm_q15_to_float
+from functools import partial
+from itertools import chain, repeat
 
-matplotlib.use("Qt5Agg")
-
-from bleak import BleakScanner, BleakClient
-from bleak.backends.device import BLEDevice
+from bleak import BleakClient
+from bleak.exc import BleakError
 
 from PyQt5 import QtCore, QtGui, QtWidgets
 from qasync import QEventLoop, asyncSlot
-import pyqtgraph as pg
 import asyncio
 
-from matplotlib.backends.backend_qt5agg import (
-    FigureCanvasQTAgg,
-    NavigationToolbar2QT as NavigationToolbar,
-)
-from matplotlib.figure import Figure
-
-CHARACTERISTIC_UUID = f"0000{0x00f0:0{4}x}-8e22-4541-9d4c-21edae82ed19"
-
-BIN_NO = 20
-BIN_START = 10
-
-
-def distance_to_bin(distance, samp_freq):
-    freq = distance * 2 * 2e9 / (525e-6 * speed_of_light)
-    bin = freq / samp_freq * 256
-    return bin
-
-class PGCanvas(pg.PlotWidget):
-    def __init__(self, parent=None, background='default', plotItem=None, **kargs):
-        super().__init__(parent, background, plotItem, **kargs)
-        self.pi = self.getPlotItem()
-        self.pi.showGrid(x=True, y=True)
-        self.pi.setLabel('left', 'Amplitude')
-        self.pi.setLabel('bottom', 'Bins')
-        self.pi.setRange(xRange=(BIN_START, BIN_START+BIN_NO), yRange=(-60, 40))
-        self.dataline = self.pi.plot(pen=pg.mkPen('g', width=1), name='Re')
-        self.dataline2 = self.pi.plot(pen=pg.mkPen('b', width=1), name='Im')
-        self.dataline3 = self.pi.plot(pen=pg.mkPen('w', width=3), name='Lin')
-        self.dataline4 = self.pi.plot(pen=pg.mkPen('w', width=1), name='Log')
-        
-    def update_plot(self, byteobj: bytearray):
-        data_u = unpack("<120h1H5x", byteobj)
-        data_u = data_u[: (BIN_NO << 1)]
-        bins = np.arange(BIN_START, BIN_START + BIN_NO)
-        #data = np.asarray(arm_q15_to_float(data_u))
-        data = np.asarray(data_u, dtype=np.int16)
-        if BIN_START == 0:
-            data[0] += 1
-            data[1] += 1
-        Re = data[::2]
-        Im = data[1::2]
-        #lindata= np.abs(Re + 1j * Im)
-        lindata = 20*np.log10(np.abs(Re + 1j * Im))
-        #logdata = 10*np.log10((lindata*3.3/2*2)**2/1e3*1e3)
-        #self.dataline.setData(bins, Re)
-        #self.dataline2.setData(bins, Im)
-        self.dataline3.setData(bins, lindata)
-        #self.dataline4.setData(bins, logdata)
-        Re = Re/2**15
-        Im = Im/2**15
-        #with open('medida.csv', mode='a') as f:
-        #    f.write(f"{','.join(Re.astype(str))};{','.join(Im.astype(str))}\n")
-
-class MplCanvas(FigureCanvasQTAgg):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = fig.add_subplot(111)
-        self.axes.set_title("Live FFT")
-        self.axes.set_xlabel("Bins")
-        self.axes.set_ylabel("Amplitude")
-        self.axes.yaxis.set_major_locator(AutoLocator())
-        self.axes.yaxis.set_minor_locator(AutoMinorLocator())
-        self.axes.xaxis.set_major_locator(MultipleLocator(1))
-        self.axes.grid(linestyle="--", linewidth=0.5, which="major")
-        self.axes.grid(linestyle="-.", linewidth=0.1, which="minor")
-        (self.line,) = self.axes.plot(range(BIN_NO), np.zeros(BIN_NO), c="b", lw=0.8)
-        self.axes.set_xlim(BIN_START, BIN_NO - 1)
-        self.axes.set_ylim([0, 1])
-        fig.tight_layout()
-        self.next_time = 0
-        super(MplCanvas, self).__init__(fig)
-
-    def update_plot(self, byteobj: bytearray):
-        now_time = time.time_ns()
-        if self.next_time < now_time:
-            self.next_time = now_time + 50e6
-            # self.axes.cla()  # Clear the canvas.
-            data_u = unpack("<120h1H5x", byteobj)
-            data_u = data_u[: (BIN_NO << 1)]
-            bins = np.arange(BIN_START, BIN_NO)
-            #data = np.asarray(arm_q15_to_float(data_u))
-            data = data_u
-            data[0] += 1
-            data[1] += 1
-            Re = data[::2]
-            Im = data[1::2]
-            # self.axes.plot(bins, np.abs(Re + 1j*Im), c="b", lw=0.8)
-            self.line.set_data(bins, np.abs(Re + 1j * Im)/256)
-            # Trigger the canvas to update and redraw.
-            self.draw()
-            self.flush_events()
+from activity import ActivityStage, GaussianNaiveBayes
+from decoder import FRAME_FORMATS, characteristic_uuid, format_for, known_characteristics
+from devices import CACHE_PATH, RECONNECT_DELAYS, DeviceCache, find_radar
+from dsp import AlphaBetaTracker, CaCfar, ClutterFilter, clutter_alpha
+from eventlog import EventLog
+from fanout import PublishStage, make_publisher
+from graph import StreamGraph
+from history import HistoryPyramid, HistoryStage
+from pipeline import DspPipeline
+from recorder import SessionRecorder, recording_summary
+from processing import BACKENDS, BIN_NO, NUMPY, RD_RAMPS, X_DIM, Y_DIM, DopplerProcessor, RangeDopplerProcessor, RangeProcessor, load_background, make_backend
+from render import DEFAULT_FPS, RenderScheduler
+from replay import DEFAULT_FRAME_RATE, ReplayStream, pack_size
+from telemetry import MetricsLog
+from views import DopplerCanvas, HistoryCanvas, RangeCanvas, RangeDopplerCanvas
+from widgets import ActivityLabel, EventLogView, TelemetryOverlay
+
+CHARACTERISTIC_UUID = characteristic_uuid(0x00f0)
+VIEWS = ("range", "doppler", "range_doppler")
+
+@dataclass
+class Stream:
+    title: str
+    client: QtCore.QObject
+    graph: StreamGraph
+    pipeline: DspPipeline
+    # one canvas per view, side by side in widget
+    canvases: list
+    widget: QtWidgets.QWidget
+    overlay: TelemetryOverlay
+    recorder: SessionRecorder = None
+    detections_out: object = None
+    publisher: object = None
+    # processing errors already in the event log
+    errors_logged: int = 0
+
+
+@dataclass
+class ViewerConfig:
+    # plots per stream, out of VIEWS
+    views: tuple = ("range",)
+    history: int = X_DIM
+    rd_ramps: int = RD_RAMPS
+    ramp_rate: float = DEFAULT_FRAME_RATE
+    # overrides the characteristic registry, e.g. iq firmware on 0x00f0
+    frame_format: object = None
+    characteristic: str = CHARACTERISTIC_UUID
+    fps: float = DEFAULT_FPS
+    record_path: str = None
+    # mean complex range profile to subtract, see load_background
+    background: object = None
+    clutter_alpha: float = 0.0
+    # (guard, train, pfa) of the CA-CFAR detector, None to disable
+    cfar: tuple = None
+    detections_path: str = None
+    activity_model: object = None
+    # whole-session spectrogram in a pyramid, on disk at history_path
+    # or in a temporary file
+    long_history: bool = False
+    history_path: str = None
+    history_pool: str = "max"
+    # hex of every notification into the event log
+    log_packets: bool = False
+    # conversion, magnitude, FFT and dB of every processor
+    backend: object = NUMPY
+    # decoded frames shared with local processes under this name
+    publish: str = None
+    publish_transport: str = "auto"
+
+    def __post_init__(self):
+        self.long_history = self.long_history or self.history_path is not None
+
+    @classmethod
+    def from_args(cls, args):
+        """Configuration from the parsed command line, loading the files it names.
+
+        Raises ValueError for options the chosen backend cannot run and
+        for a characteristic of unknown format.
+        """
+        backend = make_backend(args.dsp_backend)
+        characteristic = characteristic_uuid(int(args.characteristic, 16))
+        if args.format is None and characteristic not in known_characteristics():
+            raise ValueError(f"characteristic {args.characteristic} has no known frame format, give it with --format")
+        if "range_doppler" in (args.view or ()):
+            backend.check_fft_length(args.rd_ramps)
+        return cls(
+            views=tuple(args.view or ["range"]),
+            history=args.history,
+            rd_ramps=args.rd_ramps,
+            ramp_rate=args.rate,
+            frame_format=FRAME_FORMATS.get(args.format),
+            characteristic=characteristic,
+            fps=args.fps,
+            record_path=args.record,
+            background=load_background(args.background) if args.background else None,
+            clutter_alpha=args.clutter_alpha,
+            cfar=(args.cfar_guard, args.cfar_train, args.cfar_pfa) if args.cfar or args.detections else None,
+            detections_path=args.detections,
+            activity_model=GaussianNaiveBayes.load(args.activity_model) if args.activity_model else None,
+            long_history=args.long_history,
+            history_path=args.history_file,
+            history_pool=args.history_pool,
+            log_packets=args.log_packets,
+            backend=backend,
+            publish=args.publish,
+            publish_transport=args.publish_transport,
+        )
 
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, config=None, metrics_log=None, event_log=None, device_cache=None, **kwargs):
         super(MainWindow, self).__init__(*args, **kwargs)
         self.resize(640, 800)
         self.setStyleSheet(
@@ -129,12 +133,28 @@ class MainWindow(QtWidgets.QMainWindow):
             QLabel { color: white; }
             """)
 
-        self._client = None
+        self.streams = []
+        self.config = config or ViewerConfig()
+        self.metrics_log = metrics_log
+        self.events = event_log or EventLog()
+        self.device_cache = device_cache or DeviceCache()
+        # connections being closed on purpose or being reestablished
+        self._closing = set()
+        self._reconnecting = set()
 
         scan_button = QtWidgets.QPushButton("Scan Devices")
         self.devices_combobox = QtWidgets.QComboBox()
+        # known radars can be connected to without scanning
+        for address in self.device_cache:
+            self.devices_combobox.addItem(self.device_cache.name(address), address)
+        self.characteristic_combobox = QtWidgets.QComboBox()
+        for uuid in known_characteristics() + [self.config.characteristic]:
+            if self.characteristic_combobox.findData(uuid) < 0:
+                self.characteristic_combobox.addItem(f"0x{uuid[4:8]}", uuid)
+        self.characteristic_combobox.setCurrentIndex(self.characteristic_combobox.findData(self.config.characteristic))
         connect_button = QtWidgets.QPushButton("Connect")
-        self.log_edit = QtWidgets.QPlainTextEdit()
+        self.log_edit = EventLogView(self.events)
+        self.streams_combobox = QtWidgets.QComboBox()
         self.disconnect_button = QtWidgets.QPushButton("Disconnect")
         self.disconnect_button.setEnabled(False)
         logo_ssr = QtWidgets.QLabel()
@@ -151,7 +171,12 @@ class MainWindow(QtWidgets.QMainWindow):
         logo_gmr.setPixmap(pixmap_gmr.scaled(100, 100, QtCore.Qt.KeepAspectRatio))
 
         #self.sc = MplCanvas(self, width=8, height=6, dpi=90)
-        self.sc = PGCanvas()
+        self.scheduler = RenderScheduler(self.config.fps, self)
+        # one plot per stream, stacked
+        self.plots = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        self.telemetry_timer = QtCore.QTimer(self)
+        self.telemetry_timer.timeout.connect(self.handle_telemetry)
+        self.telemetry_timer.start(1000)
         # Create toolbar, passing canvas as first parament, parent (self, the MainWindow) as second.
         #self.toolbar = NavigationToolbar(self.sc, self)
 
@@ -164,10 +189,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.window_title.setAlignment(QtCore.Qt.AlignLeft)
         self.layout.addLayout(self.window_title)
         #self.layout.addWidget(self.toolbar)
-        self.layout.addWidget(self.sc)
+        self.layout.addWidget(self.plots, stretch=2)
         self.toolbar_bottom.addWidget(scan_button)
         self.toolbar_bottom.addWidget(self.devices_combobox)
+        self.toolbar_bottom.addWidget(self.characteristic_combobox)
         self.toolbar_bottom.addWidget(connect_button)
+        self.toolbar_bottom.addWidget(self.streams_combobox)
         self.toolbar_bottom.addWidget(self.disconnect_button)
         self.layout.addLayout(self.toolbar_bottom)
         self.layout.addWidget(self.log_edit)
@@ -184,95 +211,410 @@ class MainWindow(QtWidgets.QMainWindow):
         self.widget.setLayout(self.layout)
         self.setCentralWidget(self.widget)
 
-    @cached_property
-    def devices(self):
-        return list()
-
-    @property
-    def current_client(self):
-        return self._client
-
-    async def build_client(self, device):
-        if self._client is not None:
-            await self._client.stop()
-        self._client = QBleakClient(device)
-        self._client.messageChanged.connect(self.handle_message_changed)
-        self._client.messageChanged.connect(self.sc.update_plot)
-        await self._client.start()
+    def _path_for(self, path, index):
+        if index == 0:
+            return path
+        stem, ext = os.path.splitext(path)
+        return f"{stem}-{index}{ext}"
+
+    def make_clutter_filter(self):
+        if self.config.background is not None:
+            return ClutterFilter(BIN_NO, background=self.config.background)
+        if self.config.clutter_alpha > 0:
+            return ClutterFilter(BIN_NO, alpha=self.config.clutter_alpha)
+        return None
+
+    def make_range_view(self, graph, pipeline, detections_out):
+        processor = RangeProcessor(graph.format, graph.telemetry, clutter=self.make_clutter_filter(), detections_out=detections_out, backend=self.config.backend)
+        if self.config.cfar is not None:
+            processor.detector = CaCfar(BIN_NO, *self.config.cfar)
+            processor.tracker = AlphaBetaTracker()
+        canvas = RangeCanvas(scheduler=self.scheduler, processor=processor)
+        graph.add_stage("range", processor)
+        self.scheduler.attach(pipeline, canvas, "range")
+        return canvas
+
+    def make_doppler_view(self, graph, pipeline):
+        processor = graph.add_stage("doppler", DopplerProcessor(self.config.history, graph.telemetry, graph.format, self.config.backend))
+        if not self.config.long_history:
+            canvas = DopplerCanvas(scheduler=self.scheduler, processor=processor)
+            self.scheduler.attach(pipeline, canvas, "doppler")
+            return canvas
+        path = None if self.config.history_path is None else self._path_for(self.config.history_path, len(self.streams))
+        pyramid = HistoryPyramid(Y_DIM, path, pool=self.config.history_pool)
+        graph.add_stage("history", HistoryStage(pyramid, processor))
+        canvas = HistoryCanvas(pyramid=pyramid, history=self.config.history, scheduler=self.scheduler, processor=processor)
+        self.scheduler.attach(pipeline, canvas, "history")
+        return canvas
+
+    def make_range_doppler_view(self, graph, pipeline):
+        processor = graph.add_stage("range_doppler", RangeDopplerProcessor(graph.format, self.config.rd_ramps, graph.telemetry, self.config.backend))
+        canvas = RangeDopplerCanvas(scheduler=self.scheduler, processor=processor, ramp_rate=self.config.ramp_rate)
+        self.scheduler.attach(pipeline, canvas, "range_doppler")
+        return canvas
+
+    def add_activity_stage(self, graph, pipeline, parent):
+        if "ramp" not in graph.format.dtype.names:
+            self.events.log("<< The activity model needs range frames")
+            return
+        doppler = graph.stages.get("doppler") or graph.add_stage(
+            "doppler", DopplerProcessor(self.config.history, graph.telemetry, graph.format, self.config.backend)
+        )
+        graph.add_stage("activity", ActivityStage(self.config.activity_model, doppler))
+        self.scheduler.attach(pipeline, ActivityLabel(parent), "activity")
+
+    async def add_stream(self, title, client, fmt):
+        graph = StreamGraph(fmt)
+        pipeline = DspPipeline(graph)
+        widget = QtWidgets.QSplitter(QtCore.Qt.Horizontal)
+        canvases = []
+        detections_out = None
+        for view in self.config.views:
+            if view != "doppler" and "ramp" not in fmt.dtype.names:
+                self.events.log(f"<< No {view} view for {fmt.name} frames")
+                continue
+            if view == "range":
+                if self.config.detections_path:
+                    detections_out = open(self._path_for(self.config.detections_path, len(self.streams)), "w")
+                canvas = self.make_range_view(graph, pipeline, detections_out)
+            elif view == "range_doppler":
+                canvas = self.make_range_doppler_view(graph, pipeline)
+            else:
+                canvas = self.make_doppler_view(graph, pipeline)
+            canvas.setTitle(title)
+            widget.addWidget(canvas)
+            canvases.append(canvas)
+        if self.config.activity_model is not None:
+            self.add_activity_stage(graph, pipeline, canvases[0] if canvases else None)
+        publisher = None
+        if self.config.publish:
+            name = self._path_for(self.config.publish, len(self.streams))
+            try:
+                publisher = make_publisher(name, fmt, self.config.publish_transport)
+                graph.add_stage("publish", PublishStage(publisher))
+                self.events.log(f"<< Publishing {title} frames as {name}")
+            except OSError as e:
+                self.events.log(f"<< Cannot publish {title} frames: {e}")
+        pipeline.start()
+        # a QSplitter would turn a child label into another pane
+        overlay = TelemetryOverlay(canvases[0] if canvases else None)
+        stream = Stream(title, client, graph, pipeline, canvases, widget, overlay, detections_out=detections_out, publisher=publisher)
+        if self.config.record_path:
+            stream.recorder = SessionRecorder(self._path_for(self.config.record_path, len(self.streams)), fmt)
+            stream.recorder.start()
+            client.messageChanged.connect(stream.recorder.write)
+        if self.config.log_packets:
+            client.messageChanged.connect(partial(self.events.packet, title))
+        client.messageChanged.connect(pipeline.submit)
+        if isinstance(client, QReplayClient):
+            client.backlog = lambda: pipeline.backlog
+        self.streams.append(stream)
+        self.plots.addWidget(widget)
+        self.streams_combobox.addItem(title, stream)
+        self.disconnect_button.setEnabled(True)
+        try:
+            await client.start()
+        except Exception:
+            await self.remove_stream(stream)
+            raise
+        return stream
+
+    async def remove_stream(self, stream):
+        # several characteristics of one device share its connection
+        shared = isinstance(stream.client, QBleakClient) and any(
+            other is not stream and getattr(other.client, "client", None) is stream.client.client
+            for other in self.streams
+        )
+        if isinstance(stream.client, QBleakClient) and not shared:
+            self._closing.add(stream.client.client)
+        await stream.client.stop(disconnect=not shared)
+        self.scheduler.detach(stream.pipeline)
+        stream.pipeline.stop()
+        if stream.recorder is not None:
+            stream.recorder.close()
+            self.events.log(f"<< {recording_summary(stream.recorder)}", source=stream.title)
+        if stream.detections_out is not None:
+            stream.detections_out.close()
+        if stream.publisher is not None:
+            stream.publisher.close()
+        for canvas in stream.canvases:
+            if isinstance(canvas, HistoryCanvas):
+                canvas.pyramid.close()
+        self.streams.remove(stream)
+        for i in range(self.streams_combobox.count()):
+            if self.streams_combobox.itemData(i) is stream:
+                self.streams_combobox.removeItem(i)
+                break
+        stream.widget.setParent(None)
+        stream.widget.deleteLater()
+        self.disconnect_button.setEnabled(bool(self.streams))
+
+    async def close_streams(self):
+        for stream in list(self.streams):
+            await self.remove_stream(stream)
+
+    async def build_client(self, device, characteristic_uuid):
+        shared = next(
+            (
+                s.client.client
+                for s in self.streams
+                if isinstance(s.client, QBleakClient) and s.client.address == QBleakClient.address_of(device)
+            ),
+            None,
+        )
+        client = QBleakClient(device, characteristic_uuid, shared, self.device_cache.name(QBleakClient.address_of(device)))
+        client.connectionLost.connect(self.handle_connection_lost)
+        title = f"{client.name} 0x{characteristic_uuid[4:8]}"
+        return await self.add_stream(title, client, self.config.frame_format or format_for(characteristic_uuid))
+
+    async def connect_device(self, device, characteristic_uuid):
+        # device is a BLEDevice from a scan or the address of a cached radar
+        if any(
+            isinstance(s.client, QBleakClient)
+            and s.client.address == QBleakClient.address_of(device)
+            and s.client.characteristic_uuid == characteristic_uuid
+            for s in self.streams
+        ):
+            self.events.log("<< Already streaming that characteristic")
+            return None
+        self.events.log(">> Connecting...")
+        try:
+            stream = await self.build_client(device, characteristic_uuid)
+        except (BleakError, asyncio.TimeoutError, OSError) as e:
+            self.events.log(f"<< Connection failed: {e}")
+            return None
+        self.device_cache.remember(stream.client.address, stream.client.name)
+        self.events.log(f"<< Connected {stream.title}!")
+        return stream
 
     @asyncSlot()
     async def handle_connect(self):
-        self.log_edit.appendPlainText(f"{time.ctime()}: >> Connecting...")
         device = self.devices_combobox.currentData()
-        if isinstance(device, BLEDevice):
-            await self.build_client(device)
-            self.log_edit.appendPlainText(f"{time.ctime()}: << Connected!")
-            self.disconnect_button.setEnabled(True)
+        if device is None:
+            return
+        await self.connect_device(device, self.characteristic_combobox.currentData())
+
+    async def auto_connect(self):
+        # the most recently used radar, or the first one found
+        if self.devices_combobox.count() == 0:
+            await self.scan()
+        device = self.devices_combobox.currentData()
+        if device is not None:
+            await self.connect_device(device, self.characteristic_combobox.currentData())
+
+    @asyncSlot(object)
+    async def handle_connection_lost(self, client):
+        connection = client.client
+        if connection in self._closing or connection in self._reconnecting:
+            return
+        # pipelines, plots and buffers stay; the streams resume on reconnect
+        self._reconnecting.add(connection)
+        self.events.log(f"<< Lost {client.name}, reconnecting...")
+        try:
+            for attempt, delay in enumerate(chain(RECONNECT_DELAYS, repeat(RECONNECT_DELAYS[-1])), 1):
+                streams = [s for s in self.streams if getattr(s.client, "client", None) is connection]
+                if not streams or connection in self._closing:
+                    return
+                try:
+                    for stream in streams:
+                        await stream.client.start()
+                    break
+                except (BleakError, asyncio.TimeoutError, OSError) as e:
+                    self.events.log(f"<< Reconnect attempt {attempt} failed ({e}), retrying in {delay:g} s")
+                    await asyncio.sleep(delay)
+        finally:
+            self._reconnecting.discard(connection)
+        self.events.log(f"<< Reconnected {client.name}!")
 
     @asyncSlot()
     async def handle_disconnect(self):
-        self.log_edit.appendPlainText(f"{time.ctime()}: >> Disconnecting...")
-        await self._client.stop()
-        self.log_edit.appendPlainText(f"{time.ctime()}: << Disconnected!")
-        self.disconnect_button.setEnabled(False)
+        stream = self.streams_combobox.currentData()
+        if stream is None:
+            return
+        self.events.log(f">> Disconnecting {stream.title}...")
+        await self.remove_stream(stream)
+        self.events.log("<< Disconnected!")
+
+    async def scan(self):
+        self.events.log(">> Scanning...")
+        device = await find_radar(self.device_cache)
+        if device is None:
+            self.events.log("<< No radar found")
+            return
+        # the fresh BLEDevice replaces a cached address, first in the list
+        for i in range(self.devices_combobox.count()):
+            if QBleakClient.address_of(self.devices_combobox.itemData(i)) == device.address:
+                self.devices_combobox.removeItem(i)
+                break
+        self.devices_combobox.insertItem(0, device.name or self.device_cache.name(device.address), device)
+        self.devices_combobox.setCurrentIndex(0)
+        self.events.log(f"<< Found {device.name or device.address}")
 
     @asyncSlot()
     async def handle_scan(self):
-        self.log_edit.appendPlainText(f"{time.ctime()}: >> Scanning...")
-        self.devices.clear()
-        devices = await BleakScanner.discover()
-        self.devices.extend([device for device in devices if device.name])
-        self.devices_combobox.clear()
-        for i, device in enumerate(self.devices):
-            self.devices_combobox.insertItem(i, device.name, device)
-        self.log_edit.appendPlainText(f"{time.ctime()}: << Scan complete")
-
-    def handle_message_changed(self, message):
-        #self.log_edit.appendPlainText(f"{time.ctime()} : >> Ramp in: {message}")
-        pass
+        await self.scan()
+
+    async def start_replay(self, replay):
+        self.events.log(f">> Replaying {replay.path}")
+        client = QReplayClient(replay)
+        client.replayFinished.connect(self.handle_replay_finished)
+        return await self.add_stream(os.path.basename(replay.path), client, replay.format)
+
+    def handle_replay_finished(self, frames, fps):
+        self.events.log(f"<< Replay done, {frames} frames at {fps:.0f} frames/s")
+
+    def handle_telemetry(self):
+        for stream in self.streams:
+            telemetry = stream.graph.telemetry
+            telemetry.backlog = stream.pipeline.backlog + self.scheduler.backlog
+            telemetry.coalesced = stream.pipeline.coalesced
+            telemetry.rendered = self.scheduler.frames_rendered
+            telemetry.render_skipped = self.scheduler.frames_dropped
+            if telemetry.errors > stream.errors_logged:
+                self.events.log(f"<< {telemetry.errors - stream.errors_logged} processing errors, last {telemetry.last_error}", source=stream.title)
+                stream.errors_logged = telemetry.errors
+            snapshot = telemetry.snapshot()
+            stream.overlay.show_snapshot(snapshot)
+            if self.metrics_log is not None:
+                snapshot["stream"] = stream.title
+                self.metrics_log.write(snapshot)
 
 
 @dataclass
 class QBleakClient(QtCore.QObject):
-    device: BLEDevice
+    # a BLEDevice, or the address of a cached radar to connect to directly
+    device: object
+    characteristic_uuid: str = CHARACTERISTIC_UUID
+    # connection shared with other characteristics of the same device
+    client: BleakClient = None
+    name: str = None
 
     messageChanged = QtCore.pyqtSignal(bytearray)
+    connectionLost = QtCore.pyqtSignal(object)
 
     def __post_init__(self):
         super().__init__()
+        self.name = getattr(self.device, "name", None) or self.name or self.address
+        if self.client is None:
+            self.client = BleakClient(self.device, disconnected_callback=self._handle_disconnect)
 
-    @cached_property
-    def client(self) -> BleakClient:
-        return BleakClient(self.device, disconnected_callback=self._handle_disconnect)
+    @staticmethod
+    def address_of(device):
+        return getattr(device, "address", device)
 
-    async def start(self):
-        await self.client.connect()
-        await self.client.start_notify(CHARACTERISTIC_UUID, self._handle_read)
+    @property
+    def address(self):
+        return self.address_of(self.device)
 
-    async def stop(self):
-        await self.client.disconnect()
+    async def start(self):
+        if not self.client.is_connected:
+            await self.client.connect()
+        await self.client.start_notify(self.characteristic_uuid, self._handle_read)
+
+    async def stop(self, disconnect=True):
+        if not self.client.is_connected:
+            return
+        if disconnect:
+            await self.client.disconnect()
+        else:
+            await self.client.stop_notify(self.characteristic_uuid)
 
     def _handle_disconnect(self, _) -> None:
-        print("Device was disconnected, goodbye.")
-        # cancelling all tasks effectively ends the program
-        for task in asyncio.all_tasks():
-            task.cancel()
+        self.connectionLost.emit(self)
 
     def _handle_read(self, _: int, data: bytearray) -> None:
         # print("received:", data)
         self.messageChanged.emit(data)
 
 
+class QReplayClient(QtCore.QObject):
+    messageChanged = QtCore.pyqtSignal(bytearray)
+    replayFinished = QtCore.pyqtSignal(int, float)
+
+    def __init__(self, stream: ReplayStream):
+        super().__init__()
+        self.stream = stream
+        # max-speed replays wait on this rather than overflow the pipeline
+        self.backlog = None
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self, disconnect=True):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self):
+        await self.stream.run(self.messageChanged.emit, self.backlog)
+        self.replayFinished.emit(self.stream.emitted, self.stream.frames_per_second)
+
+
 def main():
-    #with open('medida.csv', mode='a') as f:
-    #    f.write("I;Q\n")
-    app = QtWidgets.QApplication(sys.argv)
+    startup.mark("imports")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--view", choices=VIEWS, action="append", help="plots per stream, may be repeated (default range)")
+    parser.add_argument("--connect", action="store_true", help="connect at startup to the last radar used, or the first one found")
+    parser.add_argument("--device-cache", metavar="PATH", default=CACHE_PATH, help="where radars connected before are remembered")
+    parser.add_argument("--characteristic", default="0x00f0", help="characteristic preselected for connecting, e.g. 0x00f1")
+    parser.add_argument("--format", choices=FRAME_FORMATS, help="frame format of the radar, overriding the characteristic's")
+    parser.add_argument("--history", type=int, default=X_DIM, help="spectrogram columns kept on screen")
+    parser.add_argument("--long-history", action="store_true", help="keep the whole session in the spectrogram, zoom out with the mouse to browse it")
+    parser.add_argument("--history-file", metavar="PATH", help="keep that history in PATH rather than a temporary file (implies --long-history)")
+    parser.add_argument("--history-pool", choices=("max", "mean"), default="max", help="how zoomed-out history columns are combined")
+    parser.add_argument("--rd-ramps", type=int, default=RD_RAMPS, help="ramps per range-Doppler map")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="plot refresh rate")
+    parser.add_argument("--record", metavar="PATH", help="record raw frames to a binary session file per stream")
+    parser.add_argument("--replay", metavar="PATH", action="append", default=[], help="replay a medida*.csv capture or binary recording, may be repeated")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor, 0 for as fast as possible")
+    parser.add_argument("--pack", type=pack_size, default=1, help="replay range frames this many per multi-frame notification")
+    parser.add_argument("--rate", type=float, default=DEFAULT_FRAME_RATE, help="ramp rate of the radar, used for CSV captures and velocities")
+    parser.add_argument("--log-file", metavar="PATH", help="append the event log to this file")
+    parser.add_argument("--log-packets", action="store_true", help="log the hex of every notification (summarised on screen)")
+    parser.add_argument("--metrics", metavar="PATH", help="append stream telemetry to a JSON-lines log every second")
+    parser.add_argument("--profile-startup", action="store_true", help="print import and first-frame timings to stderr")
+    parser.add_argument("--startup-budget", type=float, default=startup.BUDGET_MS, help="cold-start budget in ms for --profile-startup")
+    parser.add_argument("--background", metavar="PATH", help="subtract the mean range profile of a background capture")
+    parser.add_argument("--clutter-alpha", type=clutter_alpha, default=0.0, help="subtract a moving-average background with this weight")
+    parser.add_argument("--cfar", action="store_true", help="detect and track targets with CA-CFAR")
+    parser.add_argument("--cfar-guard", type=int, default=1, help="CFAR guard cells on each side")
+    parser.add_argument("--cfar-train", type=int, default=4, help="CFAR training cells on each side")
+    parser.add_argument("--cfar-pfa", type=float, default=1e-3, help="CFAR probability of false alarm")
+    parser.add_argument("--detections", metavar="PATH", help="export detections and track per ramp as CSV (implies --cfar)")
+    parser.add_argument("--activity-model", metavar="PATH", help="classify the activity live with a model from activity.py train")
+    parser.add_argument("--publish", metavar="NAME", help="share decoded frames with local processes as NAME, see subscriber.py")
+    parser.add_argument("--publish-transport", choices=("auto", "shm", "socket"), default="auto", help="shared memory, a Unix socket, or shared memory when available")
+    parser.add_argument("--dsp-backend", choices=BACKENDS, default="numpy", help="float numpy, or the firmware's q15/q31 CMSIS-DSP kernels")
+    args, qt_args = parser.parse_known_args()
+    if args.history < 1:
+        parser.error("--history must be at least 1")
+    if args.cfar_train < 1:
+        parser.error("--cfar-train must be at least 1")
+    startup.BUDGET_MS = args.startup_budget
+    try:
+        config = ViewerConfig.from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    metrics_log = MetricsLog(args.metrics) if args.metrics else None
+    event_log = EventLog(path=args.log_file)
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    startup.mark("QApplication")
     loop = QEventLoop(app)
     asyncio.set_event_loop(loop)
-    w = MainWindow()
+    w = MainWindow(config=config, metrics_log=metrics_log, event_log=event_log, device_cache=DeviceCache(args.device_cache))
     w.show()
+    startup.mark("window shown")
+    if args.connect:
+        asyncio.ensure_future(w.auto_connect())
+    for path in args.replay:
+        asyncio.ensure_future(w.start_replay(ReplayStream(path, args.speed, args.rate, pack=args.pack)))
     with loop:
         loop.run_forever()
+        loop.run_until_complete(w.close_streams())
+    startup.report()
+    event_log.close()
+    if metrics_log is not None:
+        metrics_log.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import queue
+import threading
+import time
+from collections import deque
+
+_STOP = object()
+
+
+class DspPipeline:
+    """Runs a frame processor on raw notifications in a worker thread.
+
+    ``submit`` only enqueues the received bytes with their arrival time,
+    so it is cheap enough to call straight from the BLE notification
+    handler. The worker drains
+    whatever has queued up, feeds it through ``processor.process`` and
+    publishes one ``processor.result()`` per batch into a bounded
+    handoff; the GUI picks up the newest result with ``take_latest``.
+    Notifications that find the queue full are dropped and reported to
+    the processor's telemetry as overflow; an exception raised while
+    processing one is reported there too and the worker carries on.
+    Nothing here touches Qt.
+    """
+
+    def __init__(self, processor, max_pending=4096, max_results=2):
+        self.processor = processor
+        self.coalesced = 0
+        self._inbox = queue.Queue(max_pending)
+        self._results = deque(maxlen=max_results)
+        self._thread = None
+
+    @property
+    def backlog(self):
+        return self._inbox.qsize()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="dsp", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._inbox.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    def submit(self, data):
+        try:
+            self._inbox.put_nowait((time.perf_counter(), bytes(data)))
+        except queue.Full:
+            self.processor.telemetry.on_overflow(*self.processor.decoder.frame_ramps(data))
+
+    def take_latest(self):
+        # popleft until empty: a pop() and clear() pair would lose a result
+        # the worker appends in between
+        result = None
+        while True:
+            try:
+                newest = self._results.popleft()
+            except IndexError:
+                return result
+            if result is not None:
+                self.coalesced += 1
+            result = newest
+
+    def _run(self):
+        while True:
+            batch = [self._inbox.get()]
+            while True:
+                try:
+                    batch.append(self._inbox.get_nowait())
+                except queue.Empty:
+                    break
+            updated = False
+            for item in batch:
+                if item is _STOP:
+                    return
+                try:
+                    updated |= self.processor.process(item[1], item[0])
+                except Exception as e:
+                    self.processor.telemetry.on_error(e)
+            if updated:
+                try:
+                    self._results.append(self.processor.result())
+                except Exception as e:
+                    self.processor.telemetry.on_error(e)
@@ -0,0 +1,280 @@
+"""Qt-free decode and DSP stages shared by the viewers and the headless CLI."""
+import time
+
+import numpy as np
+
+from decoder import FRAME_FORMATS, PAYLOAD_FIRST_BIN, FrameDecoder
+from dsp import ClutterFilter, SlowTimeBuffer, SpectrogramBuffer, stft_power
+from graph import process_notification
+from replay import DEFAULT_FRAME_RATE, load_frames
+from telemetry import StreamTelemetry
+
+# m/s; scipy.constants costs ~100 ms of startup for this one number
+SPEED_OF_LIGHT = 299792458.0
+
+BIN_NO = 20
+BIN_START = PAYLOAD_FIRST_BIN
+
+RAMP_TIME = 525e-6
+# the 256-point FFT spans one ramp
+SAMP_FREQ = 256 / RAMP_TIME
+
+SUMS_FFT_SIZE = 20
+HOP_SIZE = 1
+X_DIM = 200
+Y_DIM = SUMS_FFT_SIZE
+
+# ramps per range-Doppler map, and the ramp repetition rate and carrier
+# that turn its Doppler bins into velocities
+RD_RAMPS = 64
+RAMP_RATE = DEFAULT_FRAME_RATE
+CARRIER_FREQ = 60e9
+
+h_window = np.hanning(SUMS_FFT_SIZE)
+
+q16_15_to_float = lambda q: q / 2**15
+
+
+def distance_to_bin(distance, samp_freq):
+    freq = distance * 2 * 2e9 / (525e-6 * SPEED_OF_LIGHT)
+    bin = freq / samp_freq * 256
+    return bin
+
+
+def bin_to_distance(bin, samp_freq=SAMP_FREQ):
+    freq = bin * samp_freq / 256
+    return freq * 525e-6 * SPEED_OF_LIGHT / (2 * 2e9)
+
+
+# -60 dB, the bottom of the plot; keeps fully cancelled bins finite
+DB_FLOOR = 1e-3
+
+
+def range_bins(payload):
+    data = payload[..., : (BIN_NO << 1)]
+    #data = np.asarray(arm_q15_to_float(data))
+    z = data[..., ::2] + 1j * data[..., 1::2]
+    if BIN_START == 0:
+        z[..., 0] += 1 + 1j
+    return z
+
+
+def to_db(z):
+    #lindata= np.abs(z)
+    return 20*np.log10(np.maximum(np.abs(z), DB_FLOOR))
+
+
+def range_profile_db(payload):
+    return to_db(range_bins(payload))
+
+
+class NumpyBackend:
+    """Float64 conversion, magnitude, FFT and dB, the reference for ``fixedpoint``."""
+
+    name = "numpy"
+
+    def to_float(self, q):
+        return q16_15_to_float(q)
+
+    def db(self, z):
+        return to_db(z)
+
+    def check_fft_length(self, n):
+        if n < 2:
+            raise ValueError(f"an FFT over {n} points has no frequency resolution")
+
+    def fft_db(self, x, gain, out, spectrum=None):
+        # spectrum: complex scratch of x's shape, saves an allocation per call
+        np.abs(np.fft.fft(x, axis=0, out=spectrum), out=out)
+        out *= gain
+        np.maximum(out, DB_FLOOR, out=out)
+        np.log10(out, out=out)
+        out *= 20
+        return out
+
+
+NUMPY = NumpyBackend()
+BACKENDS = ("numpy", "q15", "q31")
+
+
+def make_backend(name):
+    if name == "numpy":
+        return NUMPY
+    # imports cmsisdsp, which only the fixed-point backends need
+    from fixedpoint import FixedPointBackend
+
+    return FixedPointBackend(int(name[1:]), DB_FLOOR)
+
+
+def load_background(path):
+    # mean complex range profile of a background-only capture (e.g. medida03_fondo.csv)
+    _, frames, _ = load_frames(path)
+    return range_bins(frames["payload"]).mean(axis=0)
+
+
+class RangeProcessor:
+    def __init__(self, fmt, telemetry=None, clutter=None, detector=None, tracker=None, detections_out=None, backend=NUMPY):
+        self.decoder = FrameDecoder(fmt)
+        self.telemetry = telemetry or StreamTelemetry()
+        self.backend = backend
+        self.clutter = clutter
+        self.detector = detector
+        self.tracker = tracker
+        self.detections_out = detections_out
+        self.distances = bin_to_distance(np.arange(BIN_START, BIN_START + BIN_NO))
+        self.lindata = None
+        self.peaks = np.empty(0, dtype=np.intp)
+        self.track = None
+        if detections_out is not None:
+            detections_out.write("t,ramp,track_m,detections_m\n")
+
+    def process(self, byteobj, arrival=None):
+        return process_notification(self, byteobj, arrival=arrival)
+
+    def process_frame(self, frame):
+        z = range_bins(frame["payload"])
+        if self.clutter is not None:
+            z = self.clutter(z)
+        self.lindata = self.backend.db(z)
+        #logdata = 10*np.log10((lindata*3.3/2*2)**2/1e3*1e3)
+        if self.detector is not None:
+            self.detect(z, int(frame["ramp"]))
+        return True
+
+    def detect(self, z, ramp):
+        power = z.real**2 + z.imag**2
+        self.peaks = self.detector.detect(power)
+        distances = self.distances[self.peaks]
+        if self.tracker is not None:
+            self.track = self.tracker.update(distances, power[self.peaks])
+        if self.detections_out is not None:
+            track = "" if self.track is None else f"{self.track:.3f}"
+            self.detections_out.write(
+                f"{time.time():.6f},{ramp},{track},{' '.join(f'{d:.3f}' for d in distances)}\n"
+            )
+
+    def result(self):
+        return self.lindata, self.peaks, self.track
+
+
+# weight of the moving-average clutter removed before picking the slow-time bin
+SLOW_TIME_CLUTTER_ALPHA = 0.02
+
+
+def strongest_bin(z):
+    return np.take_along_axis(z, np.abs(z).argmax(axis=-1)[..., None], axis=-1)[..., 0]
+
+
+def slow_time_signal(payload, clutter=None):
+    """One complex sample per ramp: the strongest range bin once static clutter is removed."""
+    clutter = clutter or ClutterFilter(BIN_NO, alpha=SLOW_TIME_CLUTTER_ALPHA)
+    bins = range_bins(payload)
+    if bins.ndim == 1:
+        return strongest_bin(clutter(bins))
+    return np.array([strongest_bin(clutter(z)) for z in bins])
+
+
+def micro_doppler_columns(payload, backend=NUMPY):
+    data_u = backend.to_float(payload)
+    Re = data_u[::2]
+    Im = data_u[1::2]
+
+    imag_array = np.add(Re, 1j*Im)
+    # one row per SUMS_FFT_SIZE window, HOP_SIZE samples apart
+    return stft_power(imag_array, h_window, HOP_SIZE)
+
+
+class DopplerProcessor:
+    """Micro-Doppler spectrogram of an iq or a range stream.
+
+    iq frames carry fast-time samples and yield several STFT columns each.
+    Range frames carry one ramp; their slow-time signal (see
+    ``slow_time_signal``) is buffered and every ramp adds the spectrum of
+    the last ``SUMS_FFT_SIZE`` ramps.
+    """
+
+    def __init__(self, history=X_DIM, telemetry=None, fmt=FRAME_FORMATS["iq"], backend=NUMPY):
+        self.decoder = FrameDecoder(fmt)
+        self.telemetry = telemetry or StreamTelemetry()
+        # only converts iq samples; the 20-point FFTs are beyond CMSIS-DSP
+        self.backend = backend
+        self.spectrogram = SpectrogramBuffer(Y_DIM, history)
+        self.columns = None
+        self._slow_time = None
+        if "ramp" in fmt.dtype.names:
+            self._slow_time = SpectrogramBuffer(1, SUMS_FFT_SIZE, np.complex128)
+            self._clutter = ClutterFilter(BIN_NO, alpha=SLOW_TIME_CLUTTER_ALPHA)
+
+    def process(self, byteobj, arrival=None):
+        return process_notification(self, byteobj, arrival=arrival)
+
+    def process_frame(self, frame):
+        if self._slow_time is None:
+            self.columns = micro_doppler_columns(frame["payload"], self.backend)
+        else:
+            self._slow_time.append(slow_time_signal(frame["payload"], self._clutter))
+            self.columns = stft_power(self._slow_time.image[:, 0], h_window, SUMS_FFT_SIZE)
+        self.spectrogram.extend(self.columns)
+        return True
+
+    def result(self):
+        # the buffer keeps changing under the worker, hand over a snapshot
+        return self.spectrogram.image.copy()
+
+
+def velocity_axis(ramps=RD_RAMPS, ramp_rate=RAMP_RATE):
+    """Radial velocity in m/s of each row of a range-Doppler map."""
+    doppler = np.fft.fftshift(np.fft.fftfreq(ramps, 1 / ramp_rate))
+    return doppler * SPEED_OF_LIGHT / (2 * CARRIER_FREQ)
+
+
+class RangeDopplerProcessor:
+    """Range-Doppler map over the last ``ramps`` ramps of a range stream.
+
+    Every ramp is written into its row of a SlowTimeBuffer, then the
+    whole buffer is windowed, transformed along slow time and converted
+    to dB in preallocated arrays. The spectrum is scaled by the window's
+    sum so that a static target keeps the level it has in the range
+    profile; the window itself stays unscaled so that fixed-point
+    backends keep their resolution.
+    """
+
+    def __init__(self, fmt=FRAME_FORMATS["range"], ramps=RD_RAMPS, telemetry=None, backend=NUMPY):
+        self.decoder = FrameDecoder(fmt)
+        self.telemetry = telemetry or StreamTelemetry()
+        self.backend = backend
+        # fail here rather than on the first frame in the DSP worker
+        backend.check_fft_length(ramps)
+        window = np.hanning(ramps)
+        self.slow_time = SlowTimeBuffer(BIN_NO, ramps, window)
+        self._gain = 1 / window.sum()
+        self._windowed = np.empty((ramps, BIN_NO), dtype=np.complex128)
+        self._spectrum = np.empty((ramps, BIN_NO), dtype=np.complex128)
+        self._db = np.empty((ramps, BIN_NO))
+        # rows run from the most negative to the most positive velocity
+        self.map = np.full((ramps, BIN_NO), to_db(0.0))
+        self._positive = (ramps + 1) // 2
+
+    def process(self, byteobj, arrival=None):
+        return process_notification(self, byteobj, arrival=arrival)
+
+    def process_frame(self, frame):
+        row = self.slow_time.push(int(frame["ramp"]))
+        if row is None:
+            return False
+        payload = frame["payload"]
+        bins = self.slow_time.rows[row]
+        bins.real = payload[0 : 2 * BIN_NO : 2]
+        bins.imag = payload[1 : 2 * BIN_NO : 2]
+        if BIN_START == 0:
+            bins[0] += 1 + 1j
+        self.slow_time.windowed(self._windowed)
+        self.backend.fft_db(self._windowed, self._gain, self._db, self._spectrum)
+        n = self._positive
+        self.map[: len(self.map) - n] = self._db[n:]
+        self.map[len(self.map) - n :] = self._db[:n]
+        return True
+
+    def result(self):
+        # (range, velocity) for pyqtgraph's column-major images
+        return self.map.T.copy()
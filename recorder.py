@@ -0,0 +1,184 @@
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+from decoder import FRAME_FORMATS, FrameDecoder
+
+MAGIC = b"EPSREC\x00\x01"
+ALIGN = 64
+
+
+def record_dtype(fmt):
+    return np.dtype([("t", "<f8"), ("ramp", "<u4"), ("frame", fmt.dtype)])
+
+
+def pack_header(magic, meta, align=ALIGN):
+    """``magic``, a little-endian uint32 length and the JSON ``meta``.
+
+    The JSON is padded with spaces so that whatever follows starts on a
+    multiple of ``align`` bytes.
+    """
+    text = json.dumps(meta).encode()
+    head_len = len(magic) + 4 + len(text)
+    text += b" " * (-head_len % align)
+    return magic + np.uint32(len(text)).tobytes() + text
+
+
+def read_header(f, magic):
+    """JSON header written by ``pack_header``, None unless ``f`` starts with ``magic``.
+
+    Leaves ``f`` at the first byte after the header.
+    """
+    if f.read(len(magic)) != magic:
+        return None
+    header_len = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+    return json.loads(f.read(header_len))
+
+
+class SessionRecorder:
+    """Appends raw frames to a binary recording from a background thread.
+
+    The file starts with ``MAGIC``, a little-endian uint32 header length
+    and a JSON header naming the frame format; records of ``record_dtype``
+    follow at ``data_offset``. Records are fixed size, so record ``i``
+    lives at ``data_offset + i * record_size`` and the whole file can be
+    memory-mapped with ``Recording``.
+    """
+
+    def __init__(self, path, fmt, max_pending=65536):
+        self.path = path
+        self.format = fmt
+        self.decoder = FrameDecoder(fmt)
+        self.dtype = record_dtype(fmt)
+        self.recorded = 0
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        self._seq = 0
+        self._thread = None
+
+    def start(self):
+        self._file = open(self.path, "wb")
+        self._file.write(self._header())
+        self._thread = threading.Thread(target=self._run, name="recorder", daemon=True)
+        self._thread.start()
+
+    def write(self, data, t=None):
+        # multi-frame notifications are unpacked in the recorder thread
+        try:
+            self._queue.put_nowait((time.time() if t is None else t, bytes(data)))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+
+    def _header(self):
+        return pack_header(
+            MAGIC,
+            {
+                "format": self.format.name,
+                "frame_size": self.format.size,
+                "record_size": self.dtype.itemsize,
+                "created": time.time(),
+            },
+        )
+
+    def _run(self):
+        done = False
+        while not done:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                self._write_batch(batch)
+        self._file.flush()
+
+    def _write_batch(self, batch):
+        size = self.format.size
+        if all(len(d) == size for _, d in batch):
+            times = [t for t, _ in batch]
+            frames = np.frombuffer(b"".join(d for _, d in batch), dtype=self.format.dtype)
+        else:
+            decoded = [(t, self.decoder.decode_frames(d)) for t, d in batch]
+            decoded = [(t, f) for t, f in decoded if f is not None]
+            self.dropped += len(batch) - len(decoded)
+            if not decoded:
+                return
+            times = np.repeat([t for t, _ in decoded], [len(f) for _, f in decoded])
+            frames = np.concatenate([f for _, f in decoded])
+        records = np.empty(len(frames), dtype=self.dtype)
+        records["t"] = times
+        records["frame"] = frames
+        if "ramp" in self.format.dtype.names:
+            records["ramp"] = frames["ramp"]
+        else:
+            records["ramp"] = np.arange(self._seq, self._seq + len(frames))
+        self._seq += len(frames)
+        self._file.write(records.tobytes())
+        self.recorded += len(frames)
+
+
+def recording_summary(recorder):
+    summary = f"Recorded {recorder.recorded} frames to {recorder.path}"
+    if recorder.dropped:
+        summary += f", {recorder.dropped} notifications lost (recorder queue full or malformed)"
+    return summary
+
+
+class Recording:
+    """Memory-mapped, randomly seekable view of a ``SessionRecorder`` file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.header = read_header(f, MAGIC)
+            if self.header is None:
+                raise ValueError(f"{path} is not a session recording")
+            self.data_offset = f.tell()
+            f.seek(0, 2)
+            size = f.tell()
+        self.format = FRAME_FORMATS[self.header["format"]]
+        self.dtype = record_dtype(self.format)
+        # a trailing partial record from an interrupted session is ignored
+        count = (size - self.data_offset) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(
+                path, dtype=self.dtype, mode="r", offset=self.data_offset, shape=(count,)
+            )
+        else:
+            self.records = np.empty(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def offset(self, index):
+        return self.data_offset + index * self.dtype.itemsize
+
+    @property
+    def timestamps(self):
+        return self.records["t"]
+
+    @property
+    def ramps(self):
+        return self.records["ramp"]
+
+    @property
+    def frames(self):
+        return self.records["frame"]
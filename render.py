@@ -0,0 +1,72 @@
+from PyQt5 import QtCore
+
+import startup
+
+DEFAULT_FPS = 30
+
+
+class RenderScheduler(QtCore.QObject):
+    """Repaints dirty canvases on a fixed-rate timer.
+
+    Canvases keep doing their DSP at packet rate and call ``mark_dirty``;
+    only the newest state is drawn on each tick, so frames that arrive
+    faster than the display refresh are coalesced instead of queued.
+    Canvases fed by a worker ``DspPipeline`` are attached instead and
+    handed its newest result through ``set_result`` at the start of every
+    tick; with ``key`` several canvases share one pipeline and each gets
+    ``result[key]``.
+    """
+
+    def __init__(self, fps=DEFAULT_FPS, parent=None):
+        super().__init__(parent)
+        self._pending = {}
+        self._pipelines = {}
+        self.frames_rendered = 0
+        self.frames_dropped = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self.set_fps(fps)
+        self._timer.start()
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self._timer.setInterval(max(1, round(1000 / fps)))
+
+    def mark_dirty(self, canvas):
+        self._pending[canvas] = self._pending.get(canvas, 0) + 1
+
+    def attach(self, pipeline, canvas, key=None):
+        self._pipelines.setdefault(pipeline, []).append((canvas, key))
+
+    def detach(self, pipeline):
+        for canvas, _ in self._pipelines.pop(pipeline, ()):
+            self._pending.pop(canvas, None)
+
+    @property
+    def backlog(self):
+        return sum(self._pending.values())
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        for pipeline, canvases in self._pipelines.items():
+            result = pipeline.take_latest()
+            if result is None:
+                continue
+            for canvas, key in canvases:
+                if key is None:
+                    canvas.set_result(result)
+                elif key in result:
+                    canvas.set_result(result[key])
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for canvas, frames in pending.items():
+            canvas.render()
+            self.frames_rendered += 1
+            self.frames_dropped += frames - 1
+        if startup.ENABLED and self.frames_rendered == len(pending):
+            startup.mark("first frame")
+            startup.report()
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from datasets import load_csv
+from decoder import IQ_FRAME, MAX_BATCH_FRAMES, RANGE_FRAME, encode_batch
+from recorder import Recording
+
+# medida*.csv captures carry no timestamps; replay them at this ramp rate
+DEFAULT_FRAME_RATE = 100.0
+# seconds between checks of a full consumer queue in max-speed replays
+BACKLOG_POLL = 0.001
+
+
+def encode_range_frames(bins, first_ramp=0):
+    """Pack complex range bins back into RANGE_FRAME notifications."""
+    frames = np.zeros(len(bins), dtype=RANGE_FRAME.dtype)
+    q15 = np.clip(np.rint(np.stack([bins.real, bins.imag], axis=-1) * 2**15), -(2**15), 2**15 - 1)
+    n = 2 * bins.shape[1]
+    frames["payload"][:, :n] = q15.reshape(len(bins), n)
+    frames["ramp"] = (np.arange(len(bins)) + first_ramp) & 0xFFFF
+    return frames
+
+
+def simulate_frames(fmt, count, bins=20, seed=0):
+    """Synthetic frames with one target swinging back and forth plus noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(count)[:, None]
+    frames = np.zeros(count, dtype=fmt.dtype)
+    if fmt is IQ_FRAME:
+        n = np.arange(fmt.dtype["payload"].shape[0] // 2)
+        doppler = 0.2 * np.sin(2 * np.pi * t / 200)
+        iq = 0.5 * np.exp(2j * np.pi * doppler * n)
+        iq += 0.01 * (rng.standard_normal(iq.shape) + 1j * rng.standard_normal(iq.shape))
+        frames["payload"] = np.rint(np.stack([iq.real, iq.imag], axis=-1).reshape(count, -1) * 2**15)
+        return frames
+    target = bins / 2 + bins / 4 * np.sin(2 * np.pi * t / 500)
+    profile = 3000 * np.sinc(np.arange(bins) - target) * np.exp(2j * np.pi * rng.random((count, 1)))
+    profile += 30 * (rng.standard_normal(profile.shape) + 1j * rng.standard_normal(profile.shape))
+    frames["payload"][:, : 2 * bins] = np.rint(np.stack([profile.real, profile.imag], axis=-1).reshape(count, -1))
+    frames["ramp"] = np.arange(count) & 0xFFFF
+    return frames
+
+
+def load_frames(path, frame_rate=DEFAULT_FRAME_RATE):
+    """Return (format, frames, timestamps) for a CSV capture or binary recording."""
+    if str(path).endswith(".csv"):
+        frames = encode_range_frames(load_csv(path))
+        return RANGE_FRAME, frames, np.arange(len(frames)) / frame_rate
+    recording = Recording(path)
+    return recording.format, recording.frames, recording.timestamps - recording.timestamps[:1]
+
+
+def check_pack(pack):
+    if not 1 <= pack <= MAX_BATCH_FRAMES:
+        raise ValueError(f"frames per notification must be 1 to {MAX_BATCH_FRAMES}, not {pack}")
+
+
+def pack_size(text):
+    """argparse type of --pack."""
+    try:
+        pack = int(text)
+        check_pack(pack)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return pack
+
+
+class ReplayStream:
+    """Plays recorded frames back as notification bytes.
+
+    ``speed`` scales the recorded timing: 1.0 is real time, 2.0 twice as
+    fast and 0 emits frames as fast as the consumer keeps up, yielding to
+    the event loop every ``batch`` notifications. With ``pack`` > 1 range
+    frames go out that many at a time as multi-frame notifications, each
+    when its last frame is due.
+    """
+
+    def __init__(self, path, speed=1.0, frame_rate=DEFAULT_FRAME_RATE, batch=64, pack=1):
+        check_pack(pack)
+        self.path = path
+        self.speed = speed
+        self.batch = batch
+        self.pack = pack
+        self.format, self.frames, self.timestamps = load_frames(path, frame_rate)
+        self.emitted = 0
+        self.elapsed = 0.0
+
+    @classmethod
+    def simulated(cls, fmt, count, speed=1.0, frame_rate=DEFAULT_FRAME_RATE, batch=64, pack=1):
+        check_pack(pack)
+        stream = cls.__new__(cls)
+        stream.path = f"<simulated {fmt.name}>"
+        stream.speed = speed
+        stream.batch = batch
+        stream.pack = pack
+        stream.format = fmt
+        stream.frames = simulate_frames(fmt, count)
+        stream.timestamps = np.arange(count) / frame_rate
+        stream.emitted = 0
+        stream.elapsed = 0.0
+        return stream
+
+    @property
+    def frames_per_second(self):
+        return self.emitted / self.elapsed if self.elapsed else 0.0
+
+    async def run(self, emit, backlog=None):
+        if self.pack > 1 and self.format is not RANGE_FRAME:
+            raise ValueError(f"only range frames can be packed, not {self.format.name}")
+        start = time.perf_counter()
+        for n, i in enumerate(range(0, len(self.frames), self.pack)):
+            frames = self.frames[i : i + self.pack]
+            if self.speed > 0:
+                delay = start + self.timestamps[i + len(frames) - 1] / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif n % self.batch == 0:
+                # at full speed, go no faster than the consumer drains its queue
+                while backlog is not None and backlog() >= self.batch:
+                    await asyncio.sleep(BACKLOG_POLL)
+                await asyncio.sleep(0)
+            emit(bytearray(frames[0].tobytes() if self.pack == 1 else encode_batch(frames)))
+            self.emitted += len(frames)
+        while self.speed <= 0 and backlog is not None and backlog():
+            await asyncio.sleep(BACKLOG_POLL)
+        self.elapsed = time.perf_counter() - start
+        return self.emitted
@@ -0,0 +1,80 @@
+"""Cold-start profiling for the viewers.
+
+Import this module first. With ``--profile-startup`` on the command line
+it times every top-level import from then on, and ``report`` prints the
+time from interpreter start to each ``mark`` (imports done, window shown,
+first frame plotted) plus the slowest imports, flagging a blown budget.
+"""
+import builtins
+import os
+import sys
+import time
+
+ENABLED = "--profile-startup" in sys.argv
+# cold start to first plotted frame on the field laptops
+BUDGET_MS = 1500.0
+
+_t0 = time.perf_counter()
+_original_import = builtins.__import__
+_marks = []
+_imports = {}
+_reported = False
+
+
+def _interpreter_start():
+    try:
+        # seconds since boot at which this process started, Linux only
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return _t0 - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return _t0
+
+
+_start = _interpreter_start()
+
+
+_active = set()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    top = name.partition(".")[0]
+    if level or top in sys.modules or top in _active:
+        return _original_import(name, globals, locals, fromlist, level)
+    _active.add(top)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _active.discard(top)
+        _imports[top] = _imports.get(top, 0.0) + time.perf_counter() - start
+
+
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+
+def mark(label):
+    if ENABLED and label not in dict(_marks):
+        _marks.append((label, time.perf_counter()))
+
+
+def report(file=sys.stderr):
+    global _reported
+    if not ENABLED or _reported:
+        return
+    _reported = True
+    builtins.__import__ = _original_import
+    print("startup profile (ms since interpreter start)", file=file)
+    print(f"  {'python':24s}{(_t0 - _start) * 1e3:9.1f}", file=file)
+    for label, t in _marks:
+        print(f"  {label:24s}{(t - _start) * 1e3:9.1f}", file=file)
+    print("  slowest imports", file=file)
+    for name, seconds in sorted(_imports.items(), key=lambda kv: -kv[1])[:10]:
+        print(f"    {name:22s}{seconds * 1e3:9.1f}", file=file)
+    if _marks:
+        total = (_marks[-1][1] - _start) * 1e3
+        verdict = "within" if total <= BUDGET_MS else "OVER"
+        print(f"  {_marks[-1][0]} at {total:.0f} ms, {verdict} the {BUDGET_MS:.0f} ms budget", file=file)
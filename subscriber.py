@@ -0,0 +1,204 @@
+"""Read the frames a running viewer publishes (``main.py --publish NAME``).
+
+Needs only numpy, so it can be copied next to any tool on the same host.
+Each record carries the decoding time ``t``, the ``ramp`` number and the
+raw ``frame`` in the viewer's frame format (``frame["payload"]``,
+``frame["ramp"]`` ...). Readers never slow the viewer down: a reader that
+falls more than a ring behind loses the oldest frames, counted in
+``missed``.
+
+    from subscriber import connect
+
+    with connect("epsilon") as sub:
+        for records in sub:
+            print(records["ramp"], records["frame"]["payload"][:, :40])
+"""
+import json
+import os
+import socket
+import tempfile
+import time
+
+import numpy as np
+
+MAGIC = b"EPSSHM\x00\x01"
+# start of the shared segment; ``written`` counts completely written records
+HEADER = np.dtype(
+    [
+        ("magic", "S8"),
+        ("header_len", "<u4"),
+        ("capacity", "<u4"),
+        ("record_size", "<u4"),
+        ("closed", "u1"),
+        ("pad", "V3"),
+        ("written", "<u8"),
+    ]
+)
+ALIGN = 64
+POLL_INTERVAL = 0.005
+
+
+def record_dtype(frame_dtype):
+    # seq is odd while a slot is being written and 2 * n + 2 once record n is in it
+    return np.dtype([("seq", "<u8"), ("t", "<f8"), ("ramp", "<u4"), ("frame", frame_dtype)])
+
+
+def socket_path(name):
+    return os.path.join(tempfile.gettempdir(), f"{name}.sock")
+
+
+def _dtype(descr):
+    # JSON turns the tuples of dtype.descr into lists
+    def fields(d):
+        return [(n, fields(t) if isinstance(t, list) else t, *map(tuple, s)) for n, t, *s in d]
+
+    return np.dtype(fields(descr))
+
+
+def _attach(name):
+    from multiprocessing import resource_tracker, shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name, track=False)
+    except TypeError:
+        # before Python 3.13 every attached process would unlink the
+        # segment at exit
+        shm = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class Subscriber:
+    """Reader of a shared-memory ring, zero-copy if asked to."""
+
+    def __init__(self, name, from_start=False):
+        self._shm = _attach(name)
+        buf = self._shm.buf
+        self._header = np.ndarray((), dtype=HEADER, buffer=buf)
+        if bytes(self._header["magic"]) != MAGIC:
+            self._shm.close()
+            raise ValueError(f"{name} is not a frame ring")
+        meta = json.loads(bytes(buf[HEADER.itemsize : HEADER.itemsize + int(self._header["header_len"])]))
+        self.format = meta["format"]
+        self.dtype = _dtype(meta["dtype"])
+        self.capacity = int(self._header["capacity"])
+        self.ring = np.ndarray((self.capacity,), dtype=self.dtype, buffer=buf, offset=meta["data_offset"])
+        self.next = 0 if from_start else int(self._header["written"])
+        self.missed = 0
+        self._view = self._expected = None
+
+    @property
+    def closed(self):
+        return bool(self._header["closed"])
+
+    def read(self, max_frames=None, copy=True):
+        """Records published since the last read, oldest first.
+
+        With ``copy=False`` the result is a view into the ring that stops
+        at its end; it holds those frames for as long as ``intact()``.
+        """
+        written = int(self._header["written"])
+        if written - self.next > self.capacity:
+            self.missed += written - self.capacity - self.next
+            self.next = written - self.capacity
+        end = written if max_frames is None else min(written, self.next + max_frames)
+        first = self.next % self.capacity
+        if not copy:
+            end = min(end, self.next - first + self.capacity)
+        slots = np.arange(first, first + end - self.next) % self.capacity
+        records = self.ring[slots] if copy else self.ring[first : first + len(slots)]
+        expected = 2 * np.arange(self.next, end, dtype=np.uint64) + 2
+        self.next = end
+        # the writer may have lapped us while we copied; it overwrites the
+        # oldest slots first, so the stale records are a prefix
+        stale = int(((records["seq"] != expected) | (self.ring["seq"][slots] != expected)).sum())
+        self.missed += stale
+        records, expected = records[stale:], expected[stale:]
+        if not copy:
+            self._view, self._expected = records, expected
+        return records
+
+    def intact(self):
+        """Whether the view returned by the last ``read(copy=False)`` still holds its frames."""
+        return self._view is not None and np.array_equal(self._view["seq"], self._expected)
+
+    def __iter__(self):
+        while not self.closed:
+            records = self.read()
+            if len(records):
+                yield records
+            else:
+                time.sleep(POLL_INTERVAL)
+
+    def close(self):
+        # numpy views must go before the mapping can be closed
+        self._header = self.ring = self._view = None
+        self._shm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SocketSubscriber:
+    """Reader of a viewer's Unix socket, for when shared memory is not shared."""
+
+    def __init__(self, path):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+        self._file = self._sock.makefile("rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} does not publish frames")
+        header_len = int(np.frombuffer(self._file.read(4), dtype="<u4")[0])
+        meta = json.loads(self._file.read(header_len))
+        self.format = meta["format"]
+        self.dtype = _dtype(meta["dtype"])
+        self.next = None
+        self.missed = 0
+        self.closed = False
+
+    def read(self, max_frames=None):
+        """Records received since the last read; blocks until there is one."""
+        size = self.dtype.itemsize
+        chunk = self._file.read1((max_frames or 1024) * size)
+        while len(chunk) % size:
+            more = self._file.read(size - len(chunk) % size)
+            if not more:
+                break
+            chunk += more
+        if not chunk:
+            self.closed = True
+        records = np.frombuffer(chunk[: len(chunk) - len(chunk) % size], dtype=self.dtype)
+        if len(records):
+            # seq numbers frames like the ring, gaps are frames dropped for us
+            n = records["seq"] // 2 - 1
+            if self.next is not None:
+                self.missed += int(n[0] - self.next) + int((np.diff(n) - 1).sum())
+            self.next = int(n[-1]) + 1
+        return records
+
+    def __iter__(self):
+        while not self.closed:
+            records = self.read()
+            if len(records):
+                yield records
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(name, from_start=False):
+    """Subscribe to the viewer publishing as ``name``, preferring shared memory."""
+    try:
+        return Subscriber(name, from_start)
+    except FileNotFoundError:
+        return SocketSubscriber(socket_path(name))
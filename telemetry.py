@@ -0,0 +1,162 @@
+import json
+import time
+
+RAMP_MODULO = 1 << 16
+# smoothing of the running averages, as in RFC 3550 jitter estimation
+GAIN = 1 / 16
+# ramps behind the newest one whose loss a late packet can still reclaim
+LATE_WINDOW = 1024
+
+
+class StreamTelemetry:
+    """Stream health derived from the ramp counter and stage timings.
+
+    Ramp numbers are uint16 and wrap around: a forward step of less than
+    half the counter range is a gap (``delta - 1`` ramps dropped), a
+    larger one is a late packet. A late ramp that was counted as dropped
+    within the last ``LATE_WINDOW`` ramps is taken back off ``dropped``
+    and counted as out of order; one that had already arrived is a
+    duplicate. Ramps the viewer dropped itself (``on_overflow``) are not
+    counted as dropped when their gap is seen.
+    """
+
+    def __init__(self):
+        self.packets = 0
+        self.frames = 0
+        self.dropped = 0
+        self.out_of_order = 0
+        self.duplicates = 0
+        self.malformed = 0
+        # notifications a processing stage raised on, and the last error
+        self.errors = 0
+        self.last_error = None
+        # frames thrown away by the viewer itself because its DSP queue was full
+        self.overflow = 0
+        self.backlog = 0
+        self.coalesced = 0
+        # canvas redraws of the whole viewer, and updates they skipped
+        self.rendered = 0
+        self.render_skipped = 0
+        self.interval = 0.0
+        self.jitter = 0.0
+        self.decode_time = 0.0
+        self.render_time = 0.0
+        self._last_ramp = None
+        self._missing = set()
+        self._overflowed = set()
+        self._last_arrival = None
+        self._window_start = time.perf_counter()
+        self._window_packets = 0
+        self._window_frames = 0
+
+    def on_packet(self, ramp=None, arrival=None, frames=1):
+        # ramp of the first of the notification's frames, see on_ramps
+        arrival = time.perf_counter() if arrival is None else arrival
+        self.packets += 1
+        self._window_packets += 1
+        self.frames += frames
+        self._window_frames += frames
+        if self._last_arrival is not None:
+            delta_t = arrival - self._last_arrival
+            self.interval += (delta_t - self.interval) * GAIN
+            self.jitter += (abs(delta_t - self.interval) - self.jitter) * GAIN
+        self._last_arrival = arrival
+        if ramp is not None:
+            self.on_ramp(ramp)
+
+    def on_ramps(self, ramps):
+        # the other frames of a multi-frame notification
+        for ramp in ramps:
+            self.on_ramp(ramp)
+
+    def on_ramp(self, ramp):
+        if self._last_ramp is None:
+            self._last_ramp = ramp
+            return
+        delta = (ramp - self._last_ramp) % RAMP_MODULO
+        if delta == 0:
+            self.duplicates += 1
+        elif delta < RAMP_MODULO // 2:
+            gap = set()
+            if self._overflowed:
+                gap = {(self._last_ramp + k) % RAMP_MODULO for k in range(1, delta)} & self._overflowed
+                self._overflowed -= gap
+            self.dropped += delta - 1 - len(gap)
+            first = max(1, delta - LATE_WINDOW)
+            self._missing.update(
+                r for r in ((self._last_ramp + k) % RAMP_MODULO for k in range(first, delta)) if r not in gap
+            )
+            self._last_ramp = ramp
+            if len(self._missing) > 2 * LATE_WINDOW:
+                self._missing = {r for r in self._missing if (ramp - r) % RAMP_MODULO <= LATE_WINDOW}
+        elif ramp in self._missing:
+            # it was counted as dropped when the gap was seen
+            self._missing.remove(ramp)
+            self.out_of_order += 1
+            self.dropped -= 1
+        elif (self._last_ramp - ramp) % RAMP_MODULO <= LATE_WINDOW:
+            self.duplicates += 1
+        else:
+            self.out_of_order += 1
+
+    def on_overflow(self, frames, ramps=None):
+        # called from the thread submitting notifications, not the worker
+        self.overflow += frames
+        if ramps is not None:
+            self._overflowed.update(ramps.tolist())
+
+    def on_error(self, exc):
+        self.errors += 1
+        self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def on_malformed(self):
+        self.malformed += 1
+
+    def on_decode(self, seconds):
+        self.decode_time += (seconds - self.decode_time) * GAIN
+
+    def on_render(self, seconds):
+        self.render_time += (seconds - self.render_time) * GAIN
+
+    def snapshot(self):
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        rate = self._window_packets / elapsed if elapsed > 0 else 0.0
+        frame_rate = self._window_frames / elapsed if elapsed > 0 else 0.0
+        self._window_start = now
+        self._window_packets = 0
+        self._window_frames = 0
+        return {
+            "time": time.time(),
+            "packets_per_s": rate,
+            "frames_per_s": frame_rate,
+            "packets": self.packets,
+            "frames": self.frames,
+            "ramps_dropped": self.dropped,
+            "overflow": self.overflow,
+            "out_of_order": self.out_of_order,
+            "duplicates": self.duplicates,
+            "malformed": self.malformed,
+            "errors": self.errors,
+            "jitter_ms": self.jitter * 1e3,
+            "decode_ms": self.decode_time * 1e3,
+            "render_ms": self.render_time * 1e3,
+            "backlog": self.backlog,
+            "coalesced": self.coalesced,
+            "rendered": self.rendered,
+            "render_skipped": self.render_skipped,
+        }
+
+
+class MetricsLog:
+    """Appends telemetry snapshots to a file as JSON lines."""
+
+    def __init__(self, path):
+        self._file = open(path, "a")
+
+    def write(self, snapshot):
+        self._file.write(json.dumps(snapshot) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
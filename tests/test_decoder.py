@@ -0,0 +1,75 @@
+import argparse
+
+import numpy as np
+import pytest
+
+from decoder import (
+    BATCH_HEADER,
+    MAX_BATCH_FRAMES,
+    PAYLOAD_FIRST_BIN,
+    RANGE_FRAME,
+    FrameDecoder,
+    encode_batch,
+)
+from replay import pack_size
+
+
+def range_frames(n, first_ramp=0):
+    frames = np.zeros(n, dtype=RANGE_FRAME.dtype)
+    frames["ramp"] = (np.arange(n) + first_ramp) % (1 << 16)
+    frames["payload"] = np.arange(n * 120).reshape(n, 120) % 30000
+    return frames
+
+
+def test_batch_round_trip():
+    frames = range_frames(MAX_BATCH_FRAMES, first_ramp=65500)
+    data = encode_batch(frames, bin_start=PAYLOAD_FIRST_BIN + 5, bin_no=20)
+    decoded = FrameDecoder(RANGE_FRAME).decode_frames(data)
+    np.testing.assert_array_equal(decoded["ramp"], frames["ramp"])
+    np.testing.assert_array_equal(decoded["payload"][:, 10:50], frames["payload"][:, 10:50])
+    assert not decoded["payload"][:, :10].any() and not decoded["payload"][:, 50:].any()
+
+
+def test_frame_ramps_of_a_batch():
+    frames = range_frames(7, first_ramp=100)
+    count, ramps = FrameDecoder(RANGE_FRAME).frame_ramps(encode_batch(frames))
+    assert count == 7
+    np.testing.assert_array_equal(ramps, frames["ramp"])
+
+
+def test_legacy_frame_is_a_view():
+    data = range_frames(1).tobytes()
+    decoded = FrameDecoder(RANGE_FRAME).decode_frames(data)
+    assert len(decoded) == 1 and not decoded.flags.owndata
+
+
+@pytest.mark.parametrize(
+    "mangle",
+    [
+        lambda data: data[:-1],
+        lambda data: data + b"\x00",
+        lambda data: b"\x00" + data[1:],
+        lambda data: data[:1] + b"\x00" + data[2:],
+        # bins beyond the end of the frame payload
+        lambda data: data[:2] + bytes([PAYLOAD_FIRST_BIN + 50]) + data[3:],
+        lambda data: data[: BATCH_HEADER.itemsize - 1],
+    ],
+)
+def test_malformed_batches_are_counted(mangle):
+    decoder = FrameDecoder(RANGE_FRAME)
+    data = mangle(encode_batch(range_frames(3)))
+    assert decoder.decode_frames(data) is None
+    assert decoder.malformed == 1
+
+
+@pytest.mark.parametrize("n", [0, MAX_BATCH_FRAMES + 1])
+def test_batch_frame_count_limits(n):
+    with pytest.raises(ValueError):
+        encode_batch(range_frames(n))
+
+
+def test_pack_size():
+    assert pack_size(str(MAX_BATCH_FRAMES)) == MAX_BATCH_FRAMES
+    for text in ("0", "300", "x"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            pack_size(text)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from dsp import SpectrogramBuffer
+
+
+def columns(first, n, height=3):
+    return np.arange(first, first + n, dtype=float)[:, None].repeat(height, axis=1)
+
+
+def test_append_wraps_oldest_first():
+    buf = SpectrogramBuffer(3, 4)
+    for i in range(6):
+        buf.append(np.full(3, i))
+    np.testing.assert_array_equal(buf.image[:, 0], [2, 3, 4, 5])
+
+
+def test_extend_across_the_end():
+    buf = SpectrogramBuffer(3, 4)
+    buf.extend(columns(0, 3))
+    buf.extend(columns(3, 3))
+    np.testing.assert_array_equal(buf.image, columns(2, 4))
+
+
+def test_extend_longer_than_history_keeps_the_newest():
+    buf = SpectrogramBuffer(3, 4)
+    buf.append(np.full(3, -1))
+    buf.extend(columns(0, 10))
+    np.testing.assert_array_equal(buf.image, columns(6, 4))
+
+
+def test_image_is_a_view():
+    buf = SpectrogramBuffer(3, 4)
+    buf.extend(columns(0, 5))
+    assert np.shares_memory(buf.image, buf._buf)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("cmsisdsp")
+
+from fixedpoint import FixedPointBackend
+from processing import NUMPY
+
+
+@pytest.fixture(params=[15, 31])
+def backend(request):
+    return FixedPointBackend(request.param)
+
+
+def test_int16_range_payload_to_float(backend):
+    q = np.array([[-32768, -1, 0, 1, 32767]], dtype=np.int16)
+    np.testing.assert_allclose(backend.to_float(q), q / 2**15, rtol=1e-6)
+
+
+def test_int32_iq_payload_to_float(backend):
+    # q16.15: the whole int32 range, not just the int16 part
+    q = np.array([[-(2**31), -(2**20) - 3, -1, 0, 1, 2**20 + 3, 2**31 - 1]], dtype=np.int32)
+    got = backend.to_float(q)
+    assert got.shape == q.shape
+    np.testing.assert_allclose(got, q / 2**15, rtol=1e-6)
+
+
+def test_other_payloads_are_rejected(backend):
+    with pytest.raises(ValueError):
+        backend.to_float(np.zeros(4, dtype=np.int64))
+
+
+@pytest.mark.parametrize("n", [8, 24, 50, 8192])
+def test_fft_lengths_the_kernels_cannot_take(backend, n):
+    with pytest.raises(ValueError):
+        backend.check_fft_length(n)
+
+
+def test_fft_lengths_the_kernels_take(backend):
+    for n in (16, 32, 4096):
+        backend.check_fft_length(n)
+    NUMPY.check_fft_length(50)
+    with pytest.raises(ValueError):
+        NUMPY.check_fft_length(1)
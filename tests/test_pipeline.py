@@ -0,0 +1,96 @@
+import threading
+from collections import deque
+
+import numpy as np
+
+from decoder import RANGE_FRAME, FrameDecoder
+from pipeline import DspPipeline
+from telemetry import StreamTelemetry
+
+
+class Processor:
+    def __init__(self, gate=None):
+        self.decoder = FrameDecoder(RANGE_FRAME)
+        self.telemetry = StreamTelemetry()
+        self.gate = gate
+        self.seen = []
+
+    def process(self, data, arrival=None):
+        if self.gate is not None:
+            self.gate.wait()
+        frame = self.decoder.decode(data)
+        if frame is None:
+            raise ValueError("bad frame")
+        self.seen.append(int(frame["ramp"]))
+        return True
+
+    def result(self):
+        return self.seen[-1]
+
+
+def frame(ramp):
+    f = np.zeros(1, dtype=RANGE_FRAME.dtype)
+    f["ramp"] = ramp
+    return f.tobytes()
+
+
+def test_take_latest_returns_the_newest():
+    pipeline = DspPipeline(Processor(), max_results=4)
+    pipeline._results.extend([1, 2, 3])
+    assert pipeline.take_latest() == 3
+    assert pipeline.coalesced == 2
+    assert pipeline.take_latest() is None
+
+
+class RacingResults(deque):
+    """Results the worker appends to right after the first one is taken."""
+
+    def __init__(self, items, late):
+        super().__init__(items)
+        self.late = late
+
+    def _race(self, item):
+        if self.late is not None:
+            self.append(self.late)
+            self.late = None
+        return item
+
+    def pop(self):
+        return self._race(super().pop())
+
+    def popleft(self):
+        return self._race(super().popleft())
+
+
+def test_take_latest_never_loses_a_concurrent_result():
+    pipeline = DspPipeline(Processor())
+    pipeline._results = RacingResults([1], late=2)
+    assert pipeline.take_latest() == 2
+    assert pipeline.take_latest() is None
+
+
+def test_overflow_is_reported_and_the_worker_survives_errors():
+    gate = threading.Event()
+    processor = Processor(gate)
+    pipeline = DspPipeline(processor, max_pending=2)
+    pipeline.start()
+    pipeline.submit(frame(0))
+    # wait for the worker to take the first notification and block on the gate
+    while pipeline.backlog:
+        pass
+    for ramp in range(1, 6):
+        pipeline.submit(frame(ramp))
+    pipeline.submit(b"short")
+    gate.set()
+    pipeline.stop()
+    assert processor.telemetry.overflow == 3
+    assert processor.telemetry._overflowed == {3, 4, 5}
+    assert processor.seen == [0, 1, 2]
+
+    pipeline = DspPipeline(processor)
+    pipeline.start()
+    pipeline.submit(b"short")
+    pipeline.submit(frame(6))
+    pipeline.stop()
+    assert processor.telemetry.errors == 1
+    assert processor.seen[-1] == 6
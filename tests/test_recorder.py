@@ -0,0 +1,32 @@
+import io
+
+import numpy as np
+
+from decoder import RANGE_FRAME, encode_batch
+from recorder import ALIGN, Recording, SessionRecorder, pack_header, read_header
+
+
+def test_header_round_trip():
+    data = pack_header(b"MAGIC\x00\x00\x01", {"format": "range", "n": 3})
+    assert len(data) % ALIGN == 0
+    f = io.BytesIO(data + b"records")
+    assert read_header(f, b"MAGIC\x00\x00\x01") == {"format": "range", "n": 3}
+    assert f.read() == b"records"
+    assert read_header(io.BytesIO(data), b"OTHER\x00\x00\x01") is None
+
+
+def test_recording_round_trip(tmp_path):
+    frames = np.zeros(5, dtype=RANGE_FRAME.dtype)
+    frames["ramp"] = np.arange(5)
+    recorder = SessionRecorder(tmp_path / "s.rec", RANGE_FRAME)
+    recorder.start()
+    recorder.write(frames[:1].tobytes(), t=1.0)
+    recorder.write(encode_batch(frames[1:]), t=2.0)
+    recorder.write(b"short", t=3.0)
+    recorder.close()
+    assert (recorder.recorded, recorder.dropped) == (5, 1)
+
+    recording = Recording(tmp_path / "s.rec")
+    assert recording.data_offset % ALIGN == 0
+    np.testing.assert_array_equal(recording.ramps, np.arange(5))
+    np.testing.assert_array_equal(recording.timestamps, [1, 2, 2, 2, 2])
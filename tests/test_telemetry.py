@@ -0,0 +1,57 @@
+import numpy as np
+
+from telemetry import LATE_WINDOW, RAMP_MODULO, StreamTelemetry
+
+
+def feed(telemetry, ramps):
+    for ramp in ramps:
+        telemetry.on_ramp(ramp % RAMP_MODULO)
+    return telemetry
+
+
+def test_counter_wraparound_is_not_a_gap():
+    t = feed(StreamTelemetry(), range(RAMP_MODULO - 3, RAMP_MODULO + 3))
+    assert (t.dropped, t.out_of_order, t.duplicates) == (0, 0, 0)
+
+
+def test_gap_across_wraparound():
+    t = feed(StreamTelemetry(), [RAMP_MODULO - 2, RAMP_MODULO - 1, RAMP_MODULO + 2])
+    assert t.dropped == 2
+
+
+def test_late_ramp_is_reclaimed_once():
+    t = feed(StreamTelemetry(), [10, 11, 14, 12])
+    assert (t.dropped, t.out_of_order) == (1, 1)
+    feed(t, [12])
+    assert (t.dropped, t.out_of_order, t.duplicates) == (1, 1, 1)
+
+
+def test_late_ramp_that_arrived_is_a_duplicate():
+    t = feed(StreamTelemetry(), [10, 11, 12, 11])
+    assert (t.dropped, t.out_of_order, t.duplicates) == (0, 0, 1)
+
+
+def test_reclaim_across_wraparound():
+    t = feed(StreamTelemetry(), [RAMP_MODULO - 2, RAMP_MODULO + 1, RAMP_MODULO - 1, RAMP_MODULO])
+    assert (t.dropped, t.out_of_order) == (0, 2)
+
+
+def test_only_the_late_window_is_reclaimed():
+    t = feed(StreamTelemetry(), [0, 2 * LATE_WINDOW + 1])
+    assert t.dropped == 2 * LATE_WINDOW
+    feed(t, [1, 2 * LATE_WINDOW])
+    assert t.dropped == 2 * LATE_WINDOW - 1
+    assert t.out_of_order == 2
+
+
+def test_missing_ramps_stay_bounded():
+    t = StreamTelemetry()
+    feed(t, range(0, 40 * LATE_WINDOW, 3))
+    assert len(t._missing) <= 2 * LATE_WINDOW + 2
+
+
+def test_overflowed_ramps_are_not_counted_as_dropped():
+    t = feed(StreamTelemetry(), [0])
+    t.on_overflow(2, np.array([1, 2], dtype=np.uint16))
+    feed(t, [5])
+    assert (t.overflow, t.dropped) == (2, 2)
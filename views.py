@@ -0,0 +1,203 @@
+import time
+
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore
+
+from decoder import RANGE_FRAME
+from processing import (
+    BIN_NO,
+    BIN_START,
+    RAMP_RATE,
+    SAMP_FREQ,
+    X_DIM,
+    DopplerProcessor,
+    RangeDopplerProcessor,
+    RangeProcessor,
+    bin_to_distance,
+    distance_to_bin,
+    velocity_axis,
+)
+from widgets import jet_colormap
+
+
+class RangeCanvas(pg.PlotWidget):
+    def __init__(self, parent=None, background='default', plotItem=None, scheduler=None, processor=None, **kargs):
+        super().__init__(parent, background, plotItem, **kargs)
+        self.scheduler = scheduler
+        self.processor = processor or RangeProcessor(RANGE_FRAME)
+        self.telemetry = self.processor.telemetry
+        self.bins = np.arange(BIN_START, BIN_START + BIN_NO)
+        self.lindata = None
+        self.peaks = np.empty(0, dtype=np.intp)
+        self.track = None
+        self.pi = self.getPlotItem()
+        self.pi.showGrid(x=True, y=True)
+        self.pi.setLabel('left', 'Amplitude')
+        self.pi.setLabel('bottom', 'Bins')
+        self.pi.setRange(xRange=(BIN_START, BIN_START+BIN_NO), yRange=(-60, 40))
+        self.dataline = self.pi.plot(pen=pg.mkPen('g', width=1), name='Re')
+        self.dataline2 = self.pi.plot(pen=pg.mkPen('b', width=1), name='Im')
+        self.dataline3 = self.pi.plot(pen=pg.mkPen('w', width=3), name='Lin')
+        self.dataline4 = self.pi.plot(pen=pg.mkPen('w', width=1), name='Log')
+        self.markers = pg.ScatterPlotItem(symbol='t', size=12, brush=pg.mkBrush('r'), pen=None)
+        self.pi.addItem(self.markers)
+        self.track_line = pg.InfiniteLine(angle=90, pen=pg.mkPen('y', width=1, style=QtCore.Qt.DashLine))
+        self.track_line.hide()
+        self.pi.addItem(self.track_line)
+        self.track_label = pg.TextItem(color='y', anchor=(1, 0))
+        self.track_label.setPos(BIN_START + BIN_NO, 40)
+        self.pi.addItem(self.track_label)
+
+    def update_plot(self, byteobj: bytearray):
+        # inline path; the viewer normally runs the processor in a DspPipeline
+        if self.processor.process(byteobj):
+            self.set_result(self.processor.result())
+
+    def set_result(self, result):
+        self.lindata, self.peaks, self.track = result
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.mark_dirty(self)
+
+    def render(self):
+        start = time.perf_counter()
+        #self.dataline.setData(self.bins, Re)
+        #self.dataline2.setData(self.bins, Im)
+        self.dataline3.setData(self.bins, self.lindata)
+        #self.dataline4.setData(self.bins, logdata)
+        if self.processor.detector is not None:
+            self.markers.setData(self.bins[self.peaks], self.lindata[self.peaks])
+            if self.track is None:
+                self.track_line.hide()
+                self.track_label.setText("")
+            else:
+                self.track_line.setPos(distance_to_bin(self.track, SAMP_FREQ))
+                self.track_line.show()
+                self.track_label.setText(f"target {self.track:.2f} m")
+        self.telemetry.on_render(time.perf_counter() - start)
+
+
+class DopplerCanvas(pg.PlotWidget):
+    # a bare ImageItem rather than pg.ImageView: the histogram of ImageView
+    # builds a colormap menu that imports matplotlib.pyplot (~0.6 s)
+
+    def __init__(self, parent=None, background='default', plotItem=None, history=X_DIM, scheduler=None, processor=None, **kargs):
+        super().__init__(parent, background, plotItem, **kargs)
+        self.scheduler = scheduler
+        self.processor = processor or DopplerProcessor(history)
+        self.telemetry = self.processor.telemetry
+        self.image = self.processor.result()
+        self.ii = pg.ImageItem()
+        self.ii.setColorMap(jet_colormap())
+        self.vw = self.getPlotItem()
+        self.vw.addItem(self.ii)
+        self.ii.setImage(self.image)
+        self.vw.enableAutoRange('y', True)
+
+    def update_plot(self, byteobj: bytearray):
+        # inline path; the viewer normally runs the processor in a DspPipeline
+        if self.processor.process(byteobj):
+            self.set_result(self.processor.spectrogram.image)
+
+    def set_result(self, image):
+        self.image = image
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.mark_dirty(self)
+
+    def render(self):
+        start = time.perf_counter()
+        self.ii.setImage(self.image)
+        self.telemetry.on_render(time.perf_counter() - start)
+
+
+class HistoryCanvas(pg.PlotWidget):
+    """Spectrogram of a whole session, drawn from a HistoryPyramid.
+
+    Follows the newest columns until the view is panned or zoomed away
+    from them. Every repaint takes the pyramid level that fits the visible
+    span into the widget's width, so zooming out over hours of history
+    uploads no more pixels than the live view.
+    """
+
+    def __init__(self, parent=None, background='default', plotItem=None, pyramid=None, history=X_DIM, scheduler=None, processor=None, **kargs):
+        super().__init__(parent, background, plotItem, **kargs)
+        self.scheduler = scheduler
+        self.pyramid = pyramid
+        self.telemetry = (processor or DopplerProcessor(history)).telemetry
+        self.length = 0
+        self.follow = True
+        self.ii = pg.ImageItem()
+        self.ii.setColorMap(jet_colormap())
+        self.vw = self.getPlotItem()
+        self.vw.addItem(self.ii)
+        self.vw.setLabel('bottom', 'Columns')
+        self.vw.setXRange(-history, 0, padding=0)
+        self.vw.enableAutoRange('y', True)
+        vb = self.vw.getViewBox()
+        vb.sigRangeChangedManually.connect(self._handle_manual_range)
+        vb.sigXRangeChanged.connect(self._handle_x_range)
+
+    def _handle_manual_range(self, _):
+        # back to following once the newest column is in view again
+        self.follow = self.vw.viewRange()[0][1] >= self.length - 1
+        self.set_result(self.length)
+
+    def _handle_x_range(self, *_):
+        if not self.follow:
+            self.set_result(self.length)
+
+    def set_result(self, length):
+        self.length = length
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.mark_dirty(self)
+
+    def render(self):
+        start = time.perf_counter()
+        x0, x1 = self.vw.viewRange()[0]
+        if self.follow:
+            x0, x1 = self.length - (x1 - x0), self.length
+            self.vw.setXRange(x0, x1, padding=0)
+        image, first, scale = self.pyramid.window(x0, x1, max(self.width(), 1))
+        if len(image):
+            self.ii.setImage(image)
+            self.ii.setRect(QtCore.QRectF(first, 0, len(image) * scale, image.shape[1]))
+        self.telemetry.on_render(time.perf_counter() - start)
+
+
+class RangeDopplerCanvas(pg.PlotWidget):
+    def __init__(self, parent=None, background='default', plotItem=None, scheduler=None, processor=None, ramp_rate=RAMP_RATE, **kargs):
+        super().__init__(parent, background, plotItem, **kargs)
+        self.scheduler = scheduler
+        self.processor = processor or RangeDopplerProcessor()
+        self.telemetry = self.processor.telemetry
+        self.image = self.processor.result()
+        self.ii = pg.ImageItem()
+        self.ii.setColorMap(jet_colormap())
+        self.pi = self.getPlotItem()
+        self.pi.addItem(self.ii)
+        self.pi.setLabel('left', 'Velocity', units='m/s')
+        self.pi.setLabel('bottom', 'Range', units='m')
+        self.ii.setImage(self.image)
+        # pixel edges: half a bin beyond the first and last centre
+        velocity = velocity_axis(self.image.shape[1], ramp_rate)
+        dv = velocity[1] - velocity[0]
+        r0, r1 = bin_to_distance(BIN_START - 0.5), bin_to_distance(BIN_START + BIN_NO - 0.5)
+        self.ii.setRect(QtCore.QRectF(r0, velocity[0] - dv / 2, r1 - r0, dv * len(velocity)))
+
+    def set_result(self, image):
+        self.image = image
+        if self.scheduler is None:
+            self.render()
+        else:
+            self.scheduler.mark_dirty(self)
+
+    def render(self):
+        start = time.perf_counter()
+        self.ii.setImage(self.image)
+        self.telemetry.on_render(time.perf_counter() - start)
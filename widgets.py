@@ -0,0 +1,87 @@
+import numpy as np
+import pyqtgraph as pg
+from PyQt5 import QtCore, QtWidgets
+
+
+class TelemetryOverlay(QtWidgets.QLabel):
+    """Small translucent stream-health readout drawn over a plot."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "QLabel { background-color: rgba(0, 0, 0, 160); color: white; "
+            "font-family: monospace; padding: 4px; }"
+        )
+        self.move(60, 10)
+
+    def show_snapshot(self, snapshot):
+        self.setText(
+            f"{snapshot['packets_per_s']:6.1f} pkt/s  {snapshot['frames_per_s']:6.1f} frames/s  "
+            f"lost {snapshot['ramps_dropped']}  overflow {snapshot['overflow']}  ooo {snapshot['out_of_order']}  "
+            f"bad {snapshot['malformed']}  err {snapshot['errors']}\n"
+            f"jitter {snapshot['jitter_ms']:5.2f} ms  "
+            f"decode {snapshot['decode_ms']:5.2f} ms  "
+            f"render {snapshot['render_ms']:5.2f} ms  "
+            f"backlog {snapshot['backlog']}  coalesced {snapshot['coalesced']}\n"
+            f"drawn {snapshot['rendered']}  skipped {snapshot['render_skipped']}"
+        )
+        self.adjustSize()
+        self.raise_()
+
+
+class ActivityLabel(QtWidgets.QLabel):
+    """Live activity classification drawn over a plot, fed by the RenderScheduler."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "QLabel { background-color: rgba(0, 0, 0, 160); color: yellow; "
+            "font-size: 16pt; padding: 4px; }"
+        )
+        self.move(60, 60)
+
+    def set_result(self, result):
+        # the activity stage result, handed over like a canvas's
+        label, probability = result
+        self.setText(f"{label.replace('_', ' ')} {probability:.0%}")
+        self.adjustSize()
+        self.raise_()
+
+    def render(self):
+        pass
+
+
+# matplotlib's "jet" segment data; pg.colormap.get("jet", source="matplotlib")
+# would import matplotlib just for this table
+_JET = {
+    "red": ((0.0, 0.0), (0.35, 0.0), (0.66, 1.0), (0.89, 1.0), (1.0, 0.5)),
+    "green": ((0.0, 0.0), (0.125, 0.0), (0.375, 1.0), (0.64, 1.0), (0.91, 0.0), (1.0, 0.0)),
+    "blue": ((0.0, 0.5), (0.11, 1.0), (0.34, 1.0), (0.65, 0.0), (1.0, 0.0)),
+}
+
+
+def jet_colormap():
+    pos = np.unique([p for channel in _JET.values() for p, _ in channel])
+    rgb = [np.interp(pos, *zip(*_JET[c])) for c in ("red", "green", "blue")]
+    return pg.ColorMap(pos, np.round(np.column_stack(rgb) * 255).astype(np.ubyte))
+
+
+class EventLogView(QtWidgets.QPlainTextEdit):
+    """Read-only view of an EventLog, appended to in batches on a timer."""
+
+    def __init__(self, events, interval_ms=250, max_blocks=1000, parent=None):
+        super().__init__(parent)
+        self.events = events
+        self.setReadOnly(True)
+        # old lines are dropped, so layout cost stays flat over a session
+        self.setMaximumBlockCount(max_blocks)
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(interval_ms)
+
+    def flush(self):
+        lines = self.events.flush()
+        if lines:
+            self.appendPlainText("\n".join(lines))